@@ -0,0 +1,196 @@
+"""
+零字节填充工具：把生成的基础文件扩展到精确的目标大小
+各生成模块统一调用 pad_file_to，具体的填充方式在导入时按平台选定
+"""
+import mmap
+import os
+import sys
+
+# 填充用的 10MB 零字节块，导入时分配一次，所有普通写入共用
+_ZERO_CHUNK = bytes(10 * 1024 * 1024)
+_ZERO_VIEW = memoryview(_ZERO_CHUNK) # 切片不复制数据
+
+# O_DIRECT 要求缓冲区地址、文件偏移和写入长度都按扇区对齐，这里统一按 4KB 对齐
+_ALIGN = 4096
+_DIRECT_BUF_SIZE = 4 * 1024 * 1024
+
+
+def append_zeros_fallocate(filename, padding_size):
+    """
+    用 posix_fallocate 一次性为文件末尾分配 padding_size 字节的真实磁盘块，
+    文件系统只记录区段分配 (读出来全是 0)，不需要实际写入任何数据
+    :param filename: 需要填充的文件 (调用方已写入的缓冲数据需先 flush)
+    :param padding_size: 需要追加的字节数
+    :return: 尚未写入的字节数；平台或文件系统不支持时原样返回 padding_size
+    """
+    if not hasattr(os, 'posix_fallocate') or padding_size <= 0:
+        return padding_size
+
+    fd = os.open(filename, os.O_WRONLY)
+    try:
+        os.posix_fallocate(fd, os.fstat(fd).st_size, padding_size)
+    except OSError:
+        return padding_size
+    finally:
+        os.close(fd)
+    return 0
+
+def append_zeros_direct(filename, padding_size):
+    """
+    以 O_DIRECT 方式在文件末尾追加零字节，绕过页缓存
+    (填充数据只写不读，缓存它们只会挤掉其它有用的页)
+    :param filename: 需要填充的文件 (调用方已写入的缓冲数据需先 flush)
+    :param padding_size: 需要追加的字节数
+    :return: 尚未写入的尾部字节数，由调用方用普通写入补齐；
+             平台或文件系统不支持 O_DIRECT 时原样返回 padding_size
+    """
+    o_direct = getattr(os, 'O_DIRECT', 0)
+    if not o_direct or padding_size < _DIRECT_BUF_SIZE:
+        return padding_size
+
+    # 先用普通写入把文件补到 4KB 边界，之后的偏移都是对齐的
+    offset = os.path.getsize(filename)
+    head = -offset % _ALIGN
+    if head:
+        with open(filename, 'ab') as f:
+            f.write(bytes(head))
+        offset += head
+        padding_size -= head
+
+    try:
+        fd = os.open(filename, os.O_WRONLY | o_direct)
+    except OSError:
+        # 部分文件系统 (如 tmpfs) 不支持 O_DIRECT
+        return padding_size
+
+    # 匿名映射的内存天然按页对齐且已清零，可直接作为 O_DIRECT 缓冲区
+    buf = mmap.mmap(-1, _DIRECT_BUF_SIZE)
+    view = memoryview(buf)
+    try:
+        while padding_size >= _ALIGN:
+            n = min(padding_size - padding_size % _ALIGN, _DIRECT_BUF_SIZE)
+            written = os.pwrite(fd, view if n == _DIRECT_BUF_SIZE else view[:n], offset)
+            offset += written
+            padding_size -= written
+    except OSError:
+        # 写入过程中被拒绝 (如设备不接受当前对齐)，剩余部分交给调用方
+        pass
+    finally:
+        os.close(fd)
+        view.release()
+        buf.close()
+    return padding_size
+
+
+def append_zeros_sendfile(filename, padding_size):
+    """
+    用 sendfile 把 /dev/zero 的数据在内核中直接复制到文件末尾，
+    零字节完全不经过用户态缓冲区 (仅 Linux)
+    :param filename: 需要填充的文件 (调用方已写入的缓冲数据需先 flush)
+    :param padding_size: 需要追加的字节数
+    :return: 尚未写入的字节数；不支持时原样返回 padding_size
+    """
+    if not sys.platform.startswith('linux') or padding_size <= 0:
+        return padding_size
+
+    try:
+        src = os.open('/dev/zero', os.O_RDONLY)
+    except OSError:
+        return padding_size
+    try:
+        # sendfile 不接受以 O_APPEND 打开的目标，这里手动定位到文件末尾
+        dst = os.open(filename, os.O_WRONLY)
+        try:
+            os.lseek(dst, 0, os.SEEK_END)
+            while padding_size > 0:
+                n = os.sendfile(dst, src, None, min(padding_size, 1 << 30))
+                if n == 0:
+                    break
+                padding_size -= n
+        except OSError:
+            # 较旧的内核上 /dev/zero 不支持 splice，剩余部分交给调用方
+            pass
+        finally:
+            os.close(dst)
+    finally:
+        os.close(src)
+    return padding_size
+
+
+def drop_page_cache(filename):
+    """
+    提示内核丢弃该文件在页缓存中的页面：生成的文件只写不读，
+    留在缓存里只会挤掉其它进程有用的数据 (仅支持 posix_fadvise 的平台)
+    POSIX_FADV_DONTNEED 不会丢弃尚未写回磁盘的脏页，所以先 fdatasync 把数据写回
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    fd = os.open(filename, os.O_RDONLY)
+    try:
+        os.fdatasync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def append_zeros_write(filename, padding_size):
+    """
+    通用方式：分块写入零字节 (支持 writev 的平台每次系统调用提交 8 块)
+    """
+    with open(filename, 'ab', buffering=0) as f:
+        if hasattr(os, 'writev'):
+            iov = [_ZERO_CHUNK] * 8 # 同一缓冲区重复引用，不复制
+            iov_bytes = len(_ZERO_CHUNK) * len(iov)
+            while padding_size >= iov_bytes:
+                padding_size -= os.writev(f.fileno(), iov)
+        while padding_size > 0:
+            write_size = min(padding_size, len(_ZERO_CHUNK))
+            padding_size -= f.write(_ZERO_VIEW[:write_size])
+
+
+# 按平台选定真实填充 (非稀疏) 的实现，只在导入时判断一次
+# 返回值表示填充数据是否经过了页缓存 (需要 drop_page_cache)；只靠分配区段完成时没有缓存页可丢
+if sys.platform.startswith('linux'):
+    def _pad_dense(filename, padding_size):
+        # 依次尝试：fallocate 只分配区段 → sendfile 内核复制 → O_DIRECT 绕过页缓存 → 普通写入
+        padding_size = append_zeros_fallocate(filename, padding_size)
+        if padding_size <= 0:
+            return False
+        padding_size = append_zeros_sendfile(filename, padding_size)
+        padding_size = append_zeros_direct(filename, padding_size)
+        append_zeros_write(filename, padding_size)
+        return True
+elif sys.platform == 'win32':
+    def _pad_dense(filename, padding_size):
+        # NTFS 上扩展文件 (SetFilePointerEx + SetEndOfFile) 会为非稀疏文件分配真实的磁盘簇，
+        # 未写入部分读出为 0，效果等同于写入零字节，但不需要传输任何数据
+        # (SetFileValidData 需要管理员的 SE_MANAGE_VOLUME_NAME 权限，这里不使用)
+        os.truncate(filename, os.path.getsize(filename) + padding_size)
+        return False
+else:
+    def _pad_dense(filename, padding_size):
+        padding_size = append_zeros_fallocate(filename, padding_size)
+        if padding_size <= 0:
+            return False
+        append_zeros_write(filename, padding_size)
+        return True
+
+
+def pad_file_to(filename, target_bytes, sparse=True):
+    """
+    用零字节把文件填充到 target_bytes 大小 (已达到目标大小时不做任何事)
+    :param filename: 需要填充的文件 (必须已关闭或已 flush)
+    :param target_bytes: 目标大小 (字节)
+    :param sparse: True 时直接截断扩展，尾部为文件系统空洞 (瞬间完成)；
+                   False 时分配真实的磁盘空间，数据经过页缓存写入时在完成后写回并释放缓存
+    """
+    padding_size = target_bytes - os.path.getsize(filename)
+    if padding_size <= 0:
+        return
+
+    if sparse:
+        os.truncate(filename, target_bytes)
+    elif _pad_dense(filename, padding_size):
+        drop_page_cache(filename)
@@ -0,0 +1,36 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+def _run_job(job):
+    func, filename, target_size_mb = job
+    func(filename, target_size_mb)
+    return filename
+
+def generate_batch(jobs, max_workers=None):
+    """
+    并行生成多个测试文件，每个文件在独立的进程中生成 (各自的 GIL 和写入队列)
+    :param jobs: [(生成函数, 文件名, 目标大小MB), ...]
+                 生成函数需是模块级函数 (如 generate_text_file)，才能传给子进程
+    :param max_workers: 进程数，默认等于 CPU 核数
+    :return: 生成的文件名列表 (与 jobs 顺序一致)
+    """
+    if max_workers is None:
+        max_workers = min(os.cpu_count() or 1, len(jobs)) or 1
+
+    with ProcessPoolExecutor(max_workers=max_workers) as ex:
+        return list(ex.map(_run_job, jobs))
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    from docx_add import generate_fixed_size_docx
+    from txt_add import generate_text_file
+    from video_add import generate_exact_video
+
+    # 在这里修改需要批量生成的文件
+    generate_batch([
+        (generate_fixed_size_docx, "测试文档_5MB.docx", 5),
+        (generate_text_file,       "匆匆_10MB.txt", 10),
+        (generate_exact_video,     "精准测试_100MB.mp4", 100),
+    ])
@@ -1,46 +1,73 @@
+import functools
+import logging
 import os
 import sys
+import time
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 
-def generate_chinese_pdf(filename, target_size_mb):
+from _pad import pad_file_to
+
+log = logging.getLogger(__name__)
+
+# 常见中文字体路径，按顺序使用第一个能加载的
+# 如果你的系统字体在其它位置，把路径加到这里
+FONT_CANDIDATES = (
+    "C:\\Windows\\Fonts\\simhei.ttf",  # Windows 默认
+    "/System/Library/Fonts/PingFang.ttc",  # Mac 常见
+    "/usr/share/fonts/truetype/droid/DroidSansFallbackFull.ttf", # Linux 常见
+)
+CHINESE_FONT_NAME = 'MyChineseFont'
+
+@functools.lru_cache(maxsize=None)
+def _load_chinese_font():
+    """
+    查找并注册中文字体，每个进程只检查一次字体路径、只解析一次字体文件 (simhei.ttf 有好几 MB)
+    找不到可用字体的结果同样会缓存，之后的调用不再重复尝试
+    :return: 注册后的字体名，没有可用字体时返回 None
+    """
+    for font_path in FONT_CANDIDATES:
+        if not os.path.exists(font_path):
+            continue
+        try:
+            pdfmetrics.registerFont(TTFont(CHINESE_FONT_NAME, font_path))
+            return CHINESE_FONT_NAME
+        except Exception as e:
+            log.warning("⚠️ 字体加载失败: %s (%s)", font_path, e)
+    log.warning("⚠️ 未找到可用的中文字体，将回退到默认英文环境。请检查 FONT_CANDIDATES 中的路径。")
+    return None
+
+def generate_chinese_pdf(filename, target_size_mb, sparse=True):
     """
     生成包含中文内容的指定大小 PDF
+    sparse=True 时尾部零字节以稀疏文件方式扩展 (瞬间完成)，False 时逐块写入真实数据
     """
+    start_time = time.perf_counter()
     c = canvas.Canvas(filename, pagesize=A4)
 
-    # --- 核心步骤：配置中文字体 ---
-    # 默认使用 Windows 下的黑体 (SimHei)
-    # 如果你是 Mac/Linux，或者 Windows 下找不到该文件，请修改 font_path
-    font_name = 'MyChineseFont'
-    
-    # 常见字体路径猜测
-    font_path = "C:\\Windows\\Fonts\\simhei.ttf"  # Windows 默认
-    # font_path = "/System/Library/Fonts/PingFang.ttc"  # Mac 常见
-    # font_path = "/usr/share/fonts/truetype/droid/DroidSansFallbackFull.ttf" # Linux 常见
-    
-    # 尝试注册字体
-    try:
-        pdfmetrics.registerFont(TTFont(font_name, font_path))
-        c.setFont(font_name, 24) # 设置字体和大小
-        has_chinese_font = True
-    except Exception as e:
-        print(f"⚠️ 字体加载失败: {e}")
-        print(f"⚠️ 将回退到默认英文环境。请检查 '{font_path}' 是否存在。")
-        c.setFont("Helvetica", 24)
-        has_chinese_font = False
+    # --- 核心步骤：配置中文字体 (同一进程内只查找、注册一次) ---
+    font_name = _load_chinese_font()
+    has_chinese_font = font_name is not None
 
     # --- 写入内容 ---
+    # 所有文字放进同一个文本对象，只输出一个 BT/ET 块，避免每行重建文本状态
+    to = c.beginText(100, 750)
     if has_chinese_font:
-        c.drawString(100, 750, "PDF测试文档")
-        c.setFont(font_name, 14)
-        c.drawString(100, 700, f"目标文件大小: {target_size_mb} MB")
-        c.drawString(100, 620, "注意：该文件完全符合 PDF 标准，可正常打开。")
+        to.setFont(font_name, 24) # 设置字体和大小
+        to.textLine("PDF测试文档")
+        to.setFont(font_name, 14)
+        to.setTextOrigin(100, 700)
+        to.textLine(f"目标文件大小: {target_size_mb} MB")
+        to.setTextOrigin(100, 620)
+        to.textLine("注意：该文件完全符合 PDF 标准，可正常打开。")
     else:
-        c.drawString(100, 750, "Font Load Error (Text fallback to English)")
-        c.drawString(100, 700, "Please check the code to set correct font path.")
+        to.setFont("Helvetica", 24)
+        to.textLine("Font Load Error (Text fallback to English)")
+        to.setTextOrigin(100, 700)
+        to.textLine("Please check the code to set correct font path.")
+    c.drawText(to)
 
     c.save()
 
@@ -50,22 +77,20 @@ def generate_chinese_pdf(filename, target_size_mb):
     padding_size = target_bytes - current_size
 
     if padding_size <= 0:
-        print(f"⚠️ 警告: 初始文件 ({current_size/1024} KB) 已超过目标大小。")
+        log.warning("⚠️ 警告: 初始文件 (%s KB) 已超过目标大小。", current_size / 1024)
         return
 
-    print(f"正在填充二进制数据到 {target_size_mb} MB ...")
+    log.debug("正在填充二进制数据到 %s MB ...", target_size_mb)
     
-    chunk_size = 10 * 1024 * 1024 # 每次写入 10MB
     with open(filename, 'ab') as f:
         f.write(b'\n') # 安全换行
-        while padding_size > 0:
-            write_size = min(padding_size, chunk_size)
-            f.write(b'\0' * write_size)
-            padding_size -= write_size
+    pad_file_to(filename, target_bytes, sparse)
 
-    print(f"✅ 成功生成中文 PDF: {filename}")
+    log.info("✅ 成功生成中文 PDF: %s (%.2f MB, 耗时 %.2f 秒)",
+             filename, target_bytes / (1024 * 1024), time.perf_counter() - start_time)
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     # 如果你是 Windows，直接运行即可
-    # 如果报错 "Can't open file..."，请确认 C:\Windows\Fonts\simhei.ttf 是否存在
+    # 如果提示找不到中文字体，请确认 FONT_CANDIDATES 中的字体文件是否存在
     generate_chinese_pdf("中文测试_100MB.pdf", 100)
\ No newline at end of file
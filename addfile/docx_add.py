@@ -1,43 +1,102 @@
+import io
+import logging
 import os
+import time
+import zipfile
 from docx import Document
 
+log = logging.getLogger(__name__)
+
+DOCUMENT_XML = 'word/document.xml'
+
+# ZIP 中每个不压缩条目的固定开销：本地文件头 30 字节 + 中央目录项 46 字节 (各自再加上文件名长度)，
+# 结尾的中央目录结束记录固定 22 字节 (条目都不带 extra 字段时)
+_LOCAL_HEADER_SIZE = 30
+_CENTRAL_HEADER_SIZE = 46
+_END_RECORD_SIZE = 22
+
+# 填充用的段落，正文按整段平铺，不足一段的尾数用段落之间的空白补齐
+_PAD_PARAGRAPH = ('<w:p><w:r><w:t>'
+                  + '燕子去了，有再来的时候；杨柳枯了，有再青的时候；桃花谢了，有再开的时候。' * 10
+                  + '</w:t></w:r></w:p>').encode('utf-8')
+_PAD_CHUNK = _PAD_PARAGRAPH * (1024 * 1024 // len(_PAD_PARAGRAPH)) # 约 1MB，整段平铺
+
+def _write_padded_docx(filename, parts, head, tail, target_bytes):
+    """
+    写出 docx：其它部件照常压缩 (体积很小)，word/document.xml 放在最后并以不压缩 (ZIP_STORED) 方式写入，
+    在 head 与 tail 之间流式写入填充段落，使整个文件恰好为 target_bytes
+    :return: (写出的文件大小, 填充字节数)
+    """
+    date_time = time.localtime()[:6]
+    with open(filename, 'wb') as f, zipfile.ZipFile(f, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in parts:
+            zf.writestr(zipfile.ZipInfo(name, date_time), data, zipfile.ZIP_DEFLATED)
+
+        # 不压缩的条目大小可以直接算出来，不需要反复保存再测量
+        names = [name for name, _ in parts] + [DOCUMENT_XML]
+        base_size = (f.tell() + _LOCAL_HEADER_SIZE + len(DOCUMENT_XML) + len(head) + len(tail)
+                     + sum(_CENTRAL_HEADER_SIZE + len(name) for name in names) + _END_RECORD_SIZE)
+        padding_size = max(target_bytes - base_size, 0)
+
+        info = zipfile.ZipInfo(DOCUMENT_XML, date_time)
+        info.compress_type = zipfile.ZIP_STORED
+        info.file_size = len(head) + padding_size + len(tail)
+        with zf.open(info, 'w') as w:
+            w.write(head)
+            chunk = memoryview(_PAD_CHUNK)
+            full, rest = divmod(padding_size, len(_PAD_PARAGRAPH))
+            per_chunk = len(_PAD_CHUNK) // len(_PAD_PARAGRAPH)
+            while full >= per_chunk:
+                w.write(chunk)
+                full -= per_chunk
+            w.write(chunk[:full * len(_PAD_PARAGRAPH)])
+            w.write(b' ' * rest) # 段落之间的空白不影响文档内容
+            w.write(tail)
+    return os.path.getsize(filename), padding_size
+
 def generate_fixed_size_docx(filename, target_size_mb):
     """
-    快速生成指定大小的 docx 文件 (通过二进制填充)
+    快速生成指定大小的 docx 文件 (正文不压缩存储，填充到精确大小)
     :param filename: 输出文件名
     :param target_size_mb: 目标大小 (MB)
     """
-    
-    # 1. 先生成一个合法的、最小的基础 docx 文件
+
+    start_time = time.perf_counter()
+
+    # 1. 先在内存里生成一个合法的、最小的基础 docx 文件
     doc = Document()
     doc.add_heading('文件大小测试', 0)
     doc.add_paragraph(f'这是一个自动生成的测试文件。目标大小: {target_size_mb} MB。')
-    doc.save(filename)
+    buf = io.BytesIO()
+    doc.save(buf)
 
-    # 2. 计算需要填充的字节数
-    current_size = os.path.getsize(filename)
-    target_bytes = int(target_size_mb * 1024 * 1024)
-    padding_size = target_bytes - current_size
+    with zipfile.ZipFile(buf) as src:
+        parts = [(info.filename, src.read(info)) for info in src.infolist()]
+    document_xml = dict(parts)[DOCUMENT_XML]
+    parts = [(name, data) for name, data in parts if name != DOCUMENT_XML]
 
-    if padding_size <= 0:
-        print(f"⚠️ 警告: 初始文件 ({current_size/1024/1024:.2f} MB) 已超过目标大小。")
-        return
+    # 填充段落插在节属性 (sectPr，必须是 body 的最后一个元素) 之前
+    split_at = document_xml.rfind(b'<w:sectPr')
+    if split_at < 0:
+        split_at = document_xml.rfind(b'</w:body>')
+    head, tail = document_xml[:split_at], document_xml[split_at:]
 
-    print(f"正在填充数据以达到 {target_size_mb} MB...")
+    # 2. 写出文件并填充到目标大小
+    log.debug("正在填充数据以达到 %s MB...", target_size_mb)
+    target_bytes = int(target_size_mb * 1024 * 1024)
+    final_size, padding_size = _write_padded_docx(filename, parts, head, tail, target_bytes)
 
-    # 3. 以二进制追加模式 ('ab') 打开文件并填充空字节
-    # 使用分块写入，防止生成大文件时内存溢出
-    chunk_size = 1024 * 1024 * 10 # 每次写 10MB
-    with open(filename, 'ab') as f:
-        while padding_size > 0:
-            write_size = min(padding_size, chunk_size)
-            # 写入空字节 (b'\0')
-            f.write(b'\0' * write_size)
-            padding_size -= write_size
+    if padding_size == 0 and final_size > target_bytes:
+        log.warning("⚠️ 警告: 初始文件 (%.2f MB) 已超过目标大小。", final_size / 1024 / 1024)
+    elif final_size != target_bytes:
+        # 超过 2GB 时 zipfile 会加上 ZIP64 扩展字段，按实际偏差修正目标后再写一次
+        final_size, _ = _write_padded_docx(filename, parts, head, tail,
+                                           2 * target_bytes - final_size)
 
-    final_size = os.path.getsize(filename) / (1024 * 1024)
-    print(f"✅ 成功! 文件: {filename}, 最终大小: {final_size:.2f} MB")
+    log.info("✅ 成功! 文件: %s, 最终大小: %.2f MB, 耗时 %.2f 秒",
+             filename, final_size / (1024 * 1024), time.perf_counter() - start_time)
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     # 在这里修改文件名和大小
     generate_fixed_size_docx("测试文档_5MB.docx", 5)   # 生成 10MB
\ No newline at end of file
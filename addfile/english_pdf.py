@@ -1,47 +1,116 @@
+import logging
 import os
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
+import time
 
-def generate_english_pdf(filename, target_size_mb):
+from _pad import pad_file_to
+
+log = logging.getLogger(__name__)
+
+# 只有一页、使用 PDF 内置 Helvetica 字体的最小 PDF 的固定对象
+# (页面尺寸为 A4，与 reportlab 的 A4 相同；第 5 个对象是内容流，在生成时填入)
+_PDF_CATALOG = b"<</Type/Catalog/Pages 2 0 R>>"
+_PDF_PAGES = b"<</Type/Pages/Kids[3 0 R]/Count 1>>"
+_PDF_PAGE = b"<</Type/Page/Parent 2 0 R/MediaBox[0 0 595.2756 841.8898]/Resources<</Font<</F1 4 0 R>>>>/Contents 5 0 R>>"
+_PDF_FONT = b"<</Type/Font/Subtype/Type1/BaseFont/Helvetica/Encoding/WinAnsiEncoding>>"
+_STREAM_END = b"\nendstream\nendobj\n"
+
+def _pdf_string(text):
+    """转义为 PDF 字符串字面量 (括号和反斜杠需要转义)"""
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)').encode('latin-1')
+
+class PDFPadder:
+    """
+    手工拼出最小的合法 PDF，不依赖 reportlab
+    与内容无关的部分 (文件头和前 4 个对象) 只拼接一次并缓存，
+    批量生成时每个文件只需要拼接内容流前后的两部分
+    """
+    _template = None # (固定前缀, 前缀中各对象的偏移)
+
+    @classmethod
+    def _get_template(cls):
+        if cls._template is None:
+            out = bytearray(b"%PDF-1.4\n")
+            offsets = []
+            for num, body in enumerate((_PDF_CATALOG, _PDF_PAGES, _PDF_PAGE, _PDF_FONT), 1):
+                offsets.append(len(out))
+                out += b"%d 0 obj\n%b\nendobj\n" % (num, body)
+            cls._template = (bytes(out), offsets)
+        return cls._template
+
+    @classmethod
+    def build_parts(cls, stream_length):
+        """
+        :param stream_length: 页面内容流的字节数
+        :return: (内容流之前的部分, 内容流之后的部分)
+                 /Length 和 startxref 都按 10 位定宽写出，两部分的长度与 stream_length 无关
+        """
+        prefix, offsets = cls._get_template()
+        offsets = offsets + [len(prefix)]
+        head = prefix + b"5 0 obj\n<</Length %010d>>\nstream\n" % stream_length
+
+        # 交叉引用表：每条记录固定 20 字节
+        tail = bytearray(_STREAM_END)
+        xref_pos = len(head) + stream_length + len(tail)
+        tail += b"xref\n0 %d\n0000000000 65535 f \n" % (len(offsets) + 1)
+        for offset in offsets:
+            tail += b"%010d 00000 n \n" % offset
+        tail += b"trailer\n<</Size %d/Root 1 0 R>>\nstartxref\n%010d\n%%%%EOF\n" % (len(offsets) + 1, xref_pos)
+        return head, bytes(tail)
+
+def generate_english_pdf(filename, target_size_mb, sparse=True):
     """
-    生成指定大小的 PDF (通过 reportlab 生成头，尾部填充空字节)
+    生成指定大小的 PDF (手工拼出最小 PDF，在页面内容流末尾的注释里填充空字节)
+    填充在内容流里而不是 %%EOF 之后，/Length 和交叉引用表都与实际内容一致，文件仍是结构完整的 PDF
+    sparse=True 时填充部分以稀疏文件方式扩展，False 时逐块写入零字节
     """
+    start_time = time.perf_counter()
+
     # 1. 生成基础 PDF
-    try:
-        c = canvas.Canvas(filename, pagesize=A4)
-        c.setFont("Helvetica", 20)
-        c.drawString(100, 750, "PDF Size test document")
-        c.setFont("Helvetica", 12)
-        c.drawString(100, 700, f"Size: {target_size_mb} MB")
-        c.save()
-    except Exception as e:
-        print(f"❌ 创建基础 PDF 失败: {e}")
-        return
-
-    # 2. 计算并填充大小
-    current_size = os.path.getsize(filename)
+    # 内容只有两行英文，用内置字体即可，不需要加载整个 reportlab
+    # 两行文字共用一个文本对象 (单个 BT/ET 块)
+    content = b"BT /F1 20 Tf 100 750 Td (PDF Size test document) Tj /F1 12 Tf 0 -50 Td (%b) Tj ET" % (
+        _pdf_string(f"Size: {target_size_mb} MB"))
+
+    # 2. 计算内容流长度：内容流前后两部分的长度固定，剩下的字节都归内容流
+    head, tail = PDFPadder.build_parts(0)
     target_bytes = int(target_size_mb * 1024 * 1024)
-    padding_size = target_bytes - current_size
-
-    if padding_size <= 0:
-        print(f"⚠️ 文件已达到目标大小 ({current_size/1024/1024:.2f} MB)")
-        return
-
-    print(f"正在填充 PDF 到 {target_size_mb} MB ...")
-    
-    # 3. 追加二进制数据 (分块写入，内存友好)
-    chunk_size = 10 * 1024 * 1024 # 10MB chunk
-    with open(filename, 'ab') as f:
-        # 为了保险，先换一行，避免紧贴着 %%EOF
-        f.write(b'\n') 
-        padding_size -= 1
-        
-        while padding_size > 0:
-            write_size = min(padding_size, chunk_size)
-            f.write(b'\0' * write_size)
-            padding_size -= write_size
-
-    print(f"✅ 生成完毕: {filename}")
+    stream_length = target_bytes - len(head) - len(tail)
+
+    if stream_length < len(content):
+        log.warning("⚠️ 文件已达到目标大小 (%.2f MB)",
+                    (len(head) + len(content) + len(tail)) / 1024 / 1024)
+        stream_length = len(content)
+
+    log.debug("正在填充 PDF 到 %s MB ...", target_size_mb)
+
+    # 3. 依次写入：内容流之前的部分 + 绘制指令 → 内容流末尾的一行注释 (% 到换行之间全是空字节) → 交叉引用表和文件尾
+    head, tail = PDFPadder.build_parts(stream_length)
+    stream_end = len(head) + stream_length
+    padding_size = stream_length - len(content)
+    # 写入或填充失败 (如磁盘已满) 时删除写了一半的文件，异常交给调用方处理
+    try:
+        with open(filename, 'wb') as f:
+            f.write(head)
+            f.write(content)
+            if padding_size < 3:
+                # 放不下 "\n%...\n" 时直接用空格补齐
+                f.write(b' ' * padding_size + tail)
+            else:
+                f.write(b'\n%')
+        if padding_size >= 3:
+            pad_file_to(filename, stream_end - 1, sparse)
+            with open(filename, 'ab') as f:
+                f.write(b'\n' + tail)
+    except BaseException:
+        try:
+            os.remove(filename)
+        except OSError:
+            pass
+        raise
+
+    log.info("✅ 生成完毕: %s (%.2f MB, 耗时 %.2f 秒)",
+             filename, (len(head) + stream_length + len(tail)) / (1024 * 1024), time.perf_counter() - start_time)
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     generate_english_pdf("测试文件_10MB.pdf", 10)
\ No newline at end of file
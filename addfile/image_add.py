@@ -1,48 +1,48 @@
+import logging
 import os
+import time
 from PIL import Image
-import io
 
-def generate_fixed_size_image(filename, target_size_mb, fmt='PNG'):
+from _pad import pad_file_to
+
+log = logging.getLogger(__name__)
+
+def generate_fixed_size_image(filename, target_size_mb, fmt='PNG', sparse=True):
     """
     快速生成指定大小的图片 (通过尾部填充)
     :param filename: 文件名 (如 test.jpg)
     :param target_size_mb: 目标大小 (MB)
     :param fmt: 图片格式 (JPEG, PNG)
+    :param sparse: True 时尾部以稀疏文件方式扩展，False 时逐块写入零字节
     """
-    print(f"🎨 正在生成图片: {filename} ({target_size_mb} MB)...")
+    start_time = time.perf_counter()
+    log.debug("🎨 正在生成图片: %s (%s MB)...", filename, target_size_mb)
     
-    # 1. 先在内存中生成一张合法的、极小的基础图片
+    # 1. 先生成一张合法的、极小的基础图片
     # 100x100 像素的纯色图
     img = Image.new('RGB', (100, 100), color=(255, 0, 0))
-    
-    # 将图片保存到内存 buffer 中
-    buffer = io.BytesIO()
-    img.save(buffer, format=fmt, quality=95)
-    img_data = buffer.getvalue()
-    
-    # 2. 计算需要填充的大小
-    current_size = len(img_data)
     target_bytes = int(target_size_mb * 1024 * 1024)
-    padding_size = target_bytes - current_size
+    
+    # 2. 直接把图片编码写入目标文件 (不经过 BytesIO 中转和 getvalue 复制)
+    with open(filename, 'wb') as f:
+        img.save(f, format=fmt, quality=95) # 写入正常的图片数据
+        
+        # 3. 计算需要填充的大小
+        padding_size = target_bytes - f.tell()
     
     if padding_size < 0:
-        print("⚠️ 目标大小太小，无法生成 (基础图片已超过目标大小)")
+        os.remove(filename)
+        log.warning("⚠️ 目标大小太小，无法生成 (基础图片已超过目标大小)")
         return
 
-    # 3. 写入文件
-    with open(filename, 'wb') as f:
-        f.write(img_data) # 写入正常的图片数据
-        
-        # 分块写入填充数据 (0字节)，防止内存溢出
-        chunk_size = 10 * 1024 * 1024 # 10MB
-        while padding_size > 0:
-            write_size = min(padding_size, chunk_size)
-            f.write(b'\0' * write_size)
-            padding_size -= write_size
+    # 4. 尾部填充数据 (0字节)
+    pad_file_to(filename, target_bytes, sparse)
             
-    print(f"✅ 生成完毕: {filename}")
+    log.info("✅ 生成完毕: %s (%.2f MB, 耗时 %.2f 秒)",
+             filename, target_bytes / (1024 * 1024), time.perf_counter() - start_time)
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     # 生成 5MB 的 JPG
     generate_fixed_size_image("测试图片_50MB.jpg", 50, fmt='JPEG')
     
\ No newline at end of file
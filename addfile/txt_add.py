@@ -1,6 +1,14 @@
+import errno
+import logging
+import mmap
 import os
 import time
 
+log = logging.getLogger(__name__)
+
+# 目标大小达到该值时才用 mmap 写入
+MMAP_MIN_SIZE = 4 * 1024 * 1024
+
 def generate_text_file(filename, target_size_mb):
     """
     使用指定中文文本填充生成任意大小的 TXT 文件
@@ -14,50 +22,73 @@ def generate_text_file(filename, target_size_mb):
     base_data = base_text.encode('utf-8')
     base_len = len(base_data)
     
-    print(f"📄 正在生成: {filename}")
-    print(f"🎯 目标大小: {target_size_mb} MB")
-    print(f"📝 填充文本长度: {base_len} 字节/行")
+    log.debug("📄 正在生成: %s, 🎯 目标大小: %s MB, 📝 填充文本长度: %d 字节/行",
+              filename, target_size_mb, base_len)
 
     # 3. 准备高效写入的大块缓存 (Chunk)
     # 为了防止硬盘 I/O 瓶颈，我们在内存里先拼好一个约 10MB 的大块
     # 这样生成 1GB 的文件只需要写入 100 次，而不是写入几千万次
-    chunk_target_size = 10 * 1024 * 1024 # 10MB
-    repeats = (chunk_target_size // base_len) + 1
+    # 目标文件比 10MB 小时，大块只需要够覆盖整个文件
+    target_bytes = int(target_size_mb * 1024 * 1024)
+    chunk_target_size = min(10 * 1024 * 1024, target_bytes) # 10MB
+    repeats = max(-(-chunk_target_size // base_len), 1) # 只放整行，保证大块首尾都是完整的文本
     
-    # 创建大块数据
-    big_chunk = base_data * repeats
+    # 创建大块数据：一次性预分配，再用 memoryview 原地平铺
+    # 每次把已填好的部分复制到后面，填满只需要 log2(repeats) 次内存拷贝
+    big_chunk = bytearray(base_len * repeats)
+    mv = memoryview(big_chunk)
+    mv[:base_len] = base_data
+    filled = base_len
+    while filled < len(big_chunk):
+        n = min(filled, len(big_chunk) - filled)
+        mv[filled:filled + n] = mv[:n]
+        filled += n
     
     # 4. 开始写入
-    target_bytes = int(target_size_mb * 1024 * 1024)
     written = 0
-    start_time = time.time()
+    start_time = time.perf_counter()
     
-    with open(filename, 'wb') as f: # 注意使用 wb (二进制) 模式以保证大小精准
-        while written < target_bytes:
-            remaining = target_bytes - written
-            
-            # 如果剩余需要写的大小大于一个大块，就直接写大块
-            if remaining >= len(big_chunk):
-                f.write(big_chunk)
-                written += len(big_chunk)
-            else:
+    # 先把文件扩展到目标大小，再整体映射到内存，直接在映射区里平铺大块：
+    # 不再逐块调用 write，写回磁盘交给操作系统的页缓存异步完成
+    # 注意 mmap 可写映射要求文件以读写方式打开 (w+b)
+    # 小文件的映射和预分配开销反而比一次 write 大，直接写入即可
+    with open(filename, 'w+b') as f: # 注意使用二进制模式以保证大小精准
+        if 0 < target_bytes < MMAP_MIN_SIZE:
+            written = f.write(mv[:target_bytes])
+        elif target_bytes > 0:
+            f.truncate(target_bytes)
+            # 截断得到的是稀疏文件，随后逐页写入时文件系统才零散地分配区段，
+            # 磁盘写满时还会让映射区写入直接触发 SIGBUS；这里先用 fallocate 一次性预留全部磁盘块
+            if hasattr(os, 'posix_fallocate'):
+                try:
+                    os.posix_fallocate(f.fileno(), 0, target_bytes)
+                except OSError as e:
+                    if e.errno == errno.ENOSPC:
+                        raise
+                    # 文件系统不支持时退回稀疏文件
+            with mmap.mmap(f.fileno(), target_bytes, access=mmap.ACCESS_WRITE) as mm:
+                chunk_len = len(big_chunk)
+                while target_bytes - written >= chunk_len:
+                    mm[written:written + chunk_len] = mv
+                    written += chunk_len
+
                 # 5. 处理尾部 (最后一点数据)
                 # 为了精确达到目标大小，直接截取 needed bytes
                 # 注意：如果截断点刚好在汉字的 3 个字节中间，最后一个字会显示乱码，
                 # 但这保证了文件大小是绝对精准的。
-                f.write(big_chunk[:remaining])
+                remaining = target_bytes - written
+                mm[written:] = mv[:remaining]
                 written += remaining
 
-    end_time = time.time()
-    duration = end_time - start_time
+    duration = time.perf_counter() - start_time
     
-    # 验证最终大小
-    final_size = os.path.getsize(filename)
-    print(f"✅ 生成完毕: {filename}")
-    print(f"📊 最终大小: {final_size} 字节 ({(final_size/1024/1024):.2f} MB)")
-    print(f"⚡ 耗时: {duration:.2f} 秒")
+    # 最终大小即实际写入的字节数
+    final_size = written
+    log.info("✅ 生成完毕: %s, 📊 最终大小: %d 字节 (%.2f MB), ⚡ 耗时: %.2f 秒",
+             filename, final_size, final_size / 1024 / 1024, duration)
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     # 在这里修改你想生成的大小
     
     # 生成 10MB
@@ -1,15 +1,78 @@
+import logging
+import os
+import time
+
 import cv2
 import numpy as np
-import os
 
-def generate_exact_video(filename, target_size_mb):
+# PyAV 为可选依赖：安装后直接在进程内调用 FFmpeg 编码，否则使用 OpenCV 的 VideoWriter
+try:
+    import av
+except ImportError:
+    av = None
+
+from _pad import pad_file_to
+
+log = logging.getLogger(__name__)
+
+# 编码与绘制参数只需计算一次
+# 尝试使用 mp4v 编码 (兼容性好且体积小)
+_FOURCC = cv2.VideoWriter_fourcc(*'mp4v')
+_FONT = cv2.FONT_HERSHEY_SIMPLEX
+_TEXT_COLOR = (0, 255, 0)
+
+def _iter_frames(width, height, frames_count):
+    """
+    逐帧生成简单的动态画面 (每次产出的是同一个复用的 ndarray)
+    """
+    # 只分配一帧并复用：纯色深灰背景 + 干净背景模板
+    img = np.full((height, width, 3), 50, dtype=np.uint8)
+    bg = img.copy()
+    text_area = (slice(30, 100), slice(10, 160)) # 帧号文字所在区域 (含最多三位数字)
+    # 循环内用到的函数和常量先绑定为局部变量，省去每帧的属性查找
+    put_text, copyto = cv2.putText, np.copyto
+    font, color = _FONT, _TEXT_COLOR
+    for i in range(frames_count):
+        # 只把文字区域恢复成背景，而不是整帧重新分配、填充
+        copyto(img[text_area], bg[text_area])
+        
+        # 写一行字证明是视频
+        put_text(img, str(i), (20, 80), font, 2, color, 2)
+        yield img
+
+def _encode_with_av(filename, frames, width, height, fps):
+    """
+    用 PyAV 编码 (同为 MPEG-4 Part 2)：编码器上下文只打开一次，
+    帧直接送入编码器，省去 OpenCV VideoWriter 每帧的额外复制和调用开销
+    """
+    container = av.open(filename, 'w')
+    try:
+        stream = container.add_stream('mpeg4', rate=fps)
+        stream.width, stream.height, stream.pix_fmt = width, height, 'yuv420p'
+        for img in frames:
+            container.mux(stream.encode(av.VideoFrame.from_ndarray(img, format='bgr24')))
+        container.mux(stream.encode()) # 刷新编码器中剩余的帧
+    finally:
+        container.close()
+
+def _encode_with_opencv(filename, frames, width, height, fps):
+    video_writer = cv2.VideoWriter(filename, _FOURCC, fps, (width, height))
+    try:
+        write_frame = video_writer.write
+        for img in frames:
+            write_frame(img)
+    finally:
+        video_writer.release()
+
+def generate_exact_video(filename, target_size_mb, sparse=True):
     """
     生成绝对精准大小的可播放视频。
     策略：生成一个极小的微型视频核心，然后精确填充剩余字节。
+    sparse=True 时剩余字节以稀疏文件方式扩展，False 时逐块写入零字节。
     """
     target_bytes = int(target_size_mb * 1024 * 1024)
-    print(f"🎬 正在初始化: {filename}")
-    print(f"   🎯 目标大小: {target_bytes} 字节 ({target_size_mb} MB)")
+    start_time = time.perf_counter()
+    log.debug("🎬 正在初始化: %s, 🎯 目标大小: %d 字节 (%s MB)", filename, target_bytes, target_size_mb)
 
     # --- 第一步：生成“微型”基底视频 ---
     # 使用极低参数确保基底文件非常小 (通常 < 50KB)
@@ -17,61 +80,46 @@ def generate_exact_video(filename, target_size_mb):
     fps = 10                  # 低帧率
     duration_sec = 2          # 短时长
     
-    # 如果文件已存在，先删除，防止追加模式出错
-    if os.path.exists(filename):
+    # 如果文件已存在，先删除，防止追加模式出错 (直接删除，省去一次 exists 检查)
+    try:
         os.remove(filename)
-
-    # 尝试使用 mp4v 编码 (兼容性好且体积小)
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    
-    # 注意：这里直接写入最终文件名
-    video_writer = cv2.VideoWriter(filename, fourcc, fps, (width, height))
+    except FileNotFoundError:
+        pass
 
     # 生成简单的动态画面
-    frames_count = fps * duration_sec
-    for i in range(frames_count):
-        # 纯色背景
-        img = np.zeros((height, width, 3), dtype=np.uint8)
-        img[:] = (50, 50, 50) # 深灰色背景
-        
-        # 写一行字证明是视频
-        cv2.putText(img, f"{i}", (20, 80), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 255, 0), 2)
-        video_writer.write(img)
-
-    video_writer.release()
+    # 注意：这里直接写入最终文件名
+    frames = _iter_frames(width, height, fps * duration_sec)
+    if av is not None:
+        _encode_with_av(filename, frames, width, height, fps)
+    else:
+        _encode_with_opencv(filename, frames, width, height, fps)
     
     # --- 第二步：检查基底大小 ---
     base_size = os.path.getsize(filename)
-    print(f"   📉 基底视频大小: {base_size} 字节")
+    log.debug("📉 基底视频大小: %d 字节", base_size)
 
     if base_size > target_bytes:
-        print(f"❌ 错误：目标大小 ({target_bytes} B) 小于基底视频 ({base_size} B)。")
-        print("💡 建议：目标大小至少设置为 0.1 MB。")
+        log.error("❌ 错误：目标大小 (%d B) 小于基底视频 (%d B)。💡 建议：目标大小至少设置为 0.1 MB。",
+                  target_bytes, base_size)
         return
 
     # --- 第三步：精确填充 ---
     padding_size = target_bytes - base_size
-    print(f"   🔨 需要填充: {padding_size} 字节")
+    log.debug("🔨 需要填充: %d 字节", padding_size)
     
-    # 以追加二进制模式打开 ('ab')
-    with open(filename, 'ab') as f:
-        chunk_size = 10 * 1024 * 1024 # 10MB 块
-        while padding_size > 0:
-            write_size = min(padding_size, chunk_size)
-            f.write(b'\0' * write_size)
-            padding_size -= write_size
+    pad_file_to(filename, target_bytes, sparse)
 
     # --- 第四步：最终验证 ---
     final_size = os.path.getsize(filename)
-    print(f"✅ 生成完毕: {filename}")
-    print(f"   📊 最终大小: {final_size} 字节")
-    
     if final_size == target_bytes:
-        print("   💯 结果：完美匹配 (精准到字节)")
+        log.info("✅ 生成完毕: %s, 📊 最终大小: %d 字节, 💯 完美匹配 (精准到字节), 耗时 %.2f 秒",
+                 filename, final_size, time.perf_counter() - start_time)
     else:
-        print(f"   ⚠️ 结果：有偏差 (差 {final_size - target_bytes} 字节)")
+        log.warning("⚠️ 生成完毕: %s, 📊 最终大小: %d 字节, 有偏差 (差 %d 字节)",
+                    filename, final_size, final_size - target_bytes)
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     # 测试生成 10MB 的精准视频
     generate_exact_video("精准测试_100MB.mp4", 100)
     
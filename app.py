@@ -4,28 +4,94 @@
 支持指定分割后的文件大小和格式，并提供Web界面操作
 """
 
+import functools
+import importlib
+import io
 import os
 import sys
 import json
+import logging
 import uuid
 import subprocess
 import shutil
 import math
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for
-from werkzeug.utils import secure_filename
+from urllib.parse import quote, unquote
+from flask import Flask, Request, render_template, request, jsonify, send_file, redirect, url_for
+from werkzeug.exceptions import HTTPException
+from werkzeug.utils import secure_filename, send_file as werkzeug_send_file
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# PyAV 为可选依赖，安装后探测时长和截取音视频都在进程内完成，不再启动 ffprobe/ffmpeg 子进程
+try:
+    import av
+except ImportError:
+    av = None
+
+# orjson 为可选依赖，比标准库 json 快数倍；未安装时回退到 Flask 的 jsonify
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 上传中的临时文件前缀 (列出上传文件时跳过)
+UPLOAD_TEMP_PREFIX = '.upload_'
+
+
+class UploadRequest(Request):
+    """
+    表单上传的文件直接写入上传目录下的临时文件，
+    保存时只需改名 (见 save_upload)，不必再从系统临时目录复制一遍
+    创建过的临时文件都记录在 upload_temp_files 中，请求结束时统一清理
+    (客户端断开或表单被截断时，未解析完的部分不会出现在 request.files 里)
+    """
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        stream = tempfile.NamedTemporaryFile('wb+', dir=app.config['UPLOAD_FOLDER'],
+                                             prefix=UPLOAD_TEMP_PREFIX, delete=False)
+        self.__dict__.setdefault('upload_temp_files', []).append(stream)
+        return stream
+
 
 # 创建Flask应用实例
 app = Flask(__name__)
+app.request_class = UploadRequest
 app.config['SECRET_KEY'] = 'your-secret-key-here'  # 用于会话加密
 app.config['UPLOAD_FOLDER'] = 'uploads'  # 上传文件存储目录
 app.config['OUTPUT_FOLDER'] = 'output'  # 输出文件存储目录
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024 * 1024  # 最大上传文件大小为16GB
+# 部署在 Apache (mod_xsendfile) 之后时设置环境变量 USE_X_SENDFILE=1，
+# 下载只返回 X-Sendfile 头，由前端服务器用 sendfile(2) 直接发送文件
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE') == '1'
+# 部署在 nginx 之后时设置环境变量 X_ACCEL_REDIRECT_PREFIX (如 /protected/)，
+# 上传/输出目录中的文件通过 X-Accel-Redirect 交给 nginx 的 internal location 发送
+app.config['X_ACCEL_REDIRECT_PREFIX'] = os.environ.get('X_ACCEL_REDIRECT_PREFIX', '')
 
-# 确保上传和输出目录存在
+# 确保上传和输出目录存在 (只在启动时创建，请求处理中不再检查)
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs(app.config['OUTPUT_FOLDER'], exist_ok=True)
 
+# 删除文件后清理空目录时，不能删掉这两个顶层目录
+_PROTECTED_DIRS = frozenset(os.path.abspath(app.config[key]) for key in ('UPLOAD_FOLDER', 'OUTPUT_FOLDER'))
+
+# Linux ioctl FICLONE：让目标文件直接共享源文件的数据块 (btrfs/XFS 等支持 reflink 的文件系统)
+FICLONE = 0x40049409
+
+# 二进制分割无法在内核中复制时，每次读写的缓冲区大小 (8MB)
+SPLIT_BUFFER_SIZE = io.DEFAULT_BUFFER_SIZE * 1024
+# 二进制分割时同时写入的分片数
+SPLIT_PARALLELISM = 8
+# 后台任务 (分割/生成) 的工作线程数
+JOB_WORKERS = 4
+# 后台任务完成后结果保留的秒数，超时未被 /job/<job_id> 取走的结果会被清理
+JOB_RESULT_TTL = 60 * 60
+
 # 支持的文件格式
 SUPPORTED_FORMATS = {
     'video': ['mp4', 'avi', 'mov', 'mkv', 'wmv', 'flv', 'webm', 'm4v'],
@@ -34,6 +100,10 @@ SUPPORTED_FORMATS = {
     'document': ['pdf', 'doc', 'docx', 'xls', 'xlsx', 'ppt', 'pptx', 'txt', 'rtf', 'odt', 'ods', 'odp', 'csv', 'html', 'htm', 'xml', 'epub', 'mobi', 'azw', 'azw3']
 }
 
+# 扩展名 -> 文件类型 的反向索引，导入时构建一次
+_EXT_TO_TYPE = {ext: file_type for file_type, formats in SUPPORTED_FORMATS.items() for ext in formats}
+_ALLOWED_EXTS = frozenset(_EXT_TO_TYPE)
+
 # 预设的输出格式
 OUTPUT_FORMATS = {
     'video': ['mp4', 'avi', 'mov', 'mkv', 'wmv', 'flv', 'webm'],
@@ -42,27 +112,97 @@ OUTPUT_FORMATS = {
     'document': ['pdf', 'doc', 'docx', 'xls', 'xlsx', 'ppt', 'pptx', 'txt', 'rtf', 'odt', 'ods', 'odp', 'csv', 'html', 'htm', 'xml']
 }
 
+# 所有可选的输出格式 (页面上可以为任意类型的文件选择任一格式，大小写均可)
+_OUTPUT_EXTS = frozenset(ext for formats in OUTPUT_FORMATS.values() for ext in formats)
+
+# 输出格式 -> ffmpeg 音频编码器
+_AUDIO_CODEC = {
+    'mp3': 'libmp3lame',
+    'aac': 'aac', 'mp4': 'aac', 'mov': 'aac', 'm4a': 'aac',
+    'wav': 'pcm_s16le',
+    'flac': 'flac',
+    'ogg': 'libvorbis',
+    'wma': 'wmav2',
+}
+
+# 生成模块所在目录，只在启动时加入 sys.path 一次
+ADDFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'addfile')
+if ADDFILE_DIR not in sys.path:
+    sys.path.append(ADDFILE_DIR)
+
+# 文件类别 -> 中文名称 (用于提示信息)
+_CATEGORY_LABELS = {'video': '视频', 'audio': '音频', 'image': '图片', 'document': '文档'}
+
+# (文件类别, 文档类型) -> (生成模块, 生成函数, 生成文件的默认后缀)，非文档类别的文档类型为 None
+# 生成模块依赖 cv2/reportlab/python-docx 等库，第一次用到时才导入，缺少某个库不影响其它类别
+GENERATORS = {
+    ('video', None): ('video_add', 'generate_exact_video', 'mp4'),
+    ('audio', None): ('music_add', 'generate_noise_wav', 'wav'),
+    ('image', None): ('image_add', 'generate_fixed_size_image', 'png'),
+    ('document', 'text'): ('txt_add', 'generate_text_file', 'txt'),
+    ('document', 'chinese_pdf'): ('chinese_pdf', 'generate_chinese_pdf', 'pdf'),
+    ('document', 'english_pdf'): ('english_pdf', 'generate_english_pdf', 'pdf'),
+    ('document', 'docx'): ('docx_add', 'generate_fixed_size_docx', 'docx'),
+    ('document', 'doc'): ('docx_add', 'generate_fixed_size_docx', 'docx'),
+}
+
+def _dumps(data):
+    """把数据编码为 JSON 字节串"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data).encode('utf-8')
+
+
+def ojson(data, status=200):
+    """返回 JSON 响应，用法同 jsonify (只接受一个 dict/list 参数)"""
+    if orjson is None:
+        response = jsonify(data)
+        response.status_code = status
+        return response
+    return app.response_class(orjson.dumps(data), mimetype='application/json', status=status)
+
+
+@app.teardown_request
+def cleanup_upload_temp_files(exc=None):
+    """删除请求中创建、但未被 save_upload 取走的上传临时文件 (无论表单是否解析成功)"""
+    for stream in request.__dict__.get('upload_temp_files', ()):
+        stream.close()
+        try:
+            os.remove(stream.name)
+        except FileNotFoundError:
+            pass  # 已被 save_upload 改名保存
+
+
 # 添加全局错误处理器，确保所有API端点都返回JSON格式的错误响应
 @app.errorhandler(Exception)
 def handle_exception(e):
     """处理所有未捕获的异常，返回JSON格式的错误响应"""
+    # HTTP 异常 (400 等) 保留原状态码，不当作服务器内部错误
+    if isinstance(e, HTTPException):
+        return ojson({
+            'success': False,
+            'error': e.description,
+            'message': e.description
+        }), e.code
+    
     # 获取异常信息
     error_message = str(e)
     
     # 记录错误到控制台
     print(f"服务器错误: {error_message}")
     
-    # 返回JSON格式的错误响应
-    return jsonify({
+    # 返回JSON格式的错误响应 (前端页面读取 message 字段)
+    return ojson({
         'success': False,
-        'error': f"服务器内部错误: {error_message}"
+        'error': f"服务器内部错误: {error_message}",
+        'message': f"服务器内部错误: {error_message}"
     }), 500
 
 # 添加404错误处理器
 @app.errorhandler(404)
 def handle_not_found(e):
     """处理404错误，返回JSON格式的错误响应"""
-    return jsonify({
+    return ojson({
         'success': False,
         'error': "请求的资源不存在"
     }), 404
@@ -71,7 +211,7 @@ def handle_not_found(e):
 @app.errorhandler(405)
 def handle_method_not_allowed(e):
     """处理405错误，返回JSON格式的错误响应"""
-    return jsonify({
+    return ojson({
         'success': False,
         'error': "请求方法不被允许"
     }), 405
@@ -80,7 +220,7 @@ def handle_method_not_allowed(e):
 @app.errorhandler(413)
 def handle_request_entity_too_large(e):
     """处理413错误，返回JSON格式的错误响应"""
-    return jsonify({
+    return ojson({
         'success': False,
         'error': "上传的文件过大"
     }), 413
@@ -90,44 +230,181 @@ def allowed_file(filename):
     """检查文件扩展名是否被支持"""
     if not filename:
         return False
-    
-    ext = filename.rsplit('.', 1)[1].lower()
-    for formats in SUPPORTED_FORMATS.values():
-        if ext in formats:
-            return True
-    return False
+    # rpartition 不创建列表；没有 '.' 时 sep 为空，说明没有扩展名
+    _, sep, ext = filename.rpartition('.')
+    return bool(sep) and ext.lower() in _ALLOWED_EXTS
 
 
 def get_file_type(filename):
     """根据文件扩展名确定文件类型"""
     if not filename:
         return None
-    
-    ext = filename.rsplit('.', 1)[1].lower()
-    for file_type, formats in SUPPORTED_FORMATS.items():
-        if ext in formats:
-            return file_type
-    return None
+    _, sep, ext = filename.rpartition('.')
+    return _EXT_TO_TYPE.get(ext.lower()) if sep else None
+
+
+def save_upload(file, file_path):
+    """
+    保存表单上传的文件：已写入上传目录的临时文件直接改名，否则回退到 file.save
+    """
+    temp_path = getattr(file.stream, 'name', None)
+    if isinstance(temp_path, str) and os.path.basename(temp_path).startswith(UPLOAD_TEMP_PREFIX):
+        file.stream.close()
+        os.replace(temp_path, file_path)
+    else:
+        file.save(file_path)
 
 
 def get_file_size_mb(file_path):
-    """获取文件大小（MB）"""
+    """获取文件大小（MB），也可以直接传入已知的字节数，省去一次 stat"""
+    if isinstance(file_path, int):
+        return file_path / (1024 * 1024)
     return os.path.getsize(file_path) / (1024 * 1024)
 
 
-def split_file_by_size(input_path, output_path, target_size_mb, output_format):
+def _write_all(fd, data):
+    """把 data 全部写入 fd：os.write 可能只写入一部分 (短写)，需要循环写完剩余数据"""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def _copy_range(in_fd, out_fd, offset, count):
+    """
+    把 in_fd 中从 offset 开始的 count 字节写到 out_fd 的当前位置
+    优先使用 copy_file_range / sendfile 在内核中完成复制，数据不经过 Python 的内存
+    """
+    # copy_file_range: 同一文件系统上还可能直接共享数据块 (reflink)
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while count > 0:
+                n = os.copy_file_range(in_fd, out_fd, count, offset)
+                if n == 0:
+                    break
+                offset += n
+                count -= n
+        except OSError:
+            # 旧内核或跨文件系统时不支持，剩余部分交给下面的方式
+            pass
+
+    # sendfile: Linux 上目标可以是普通文件
+    if count > 0 and hasattr(os, 'sendfile'):
+        try:
+            while count > 0:
+                n = os.sendfile(out_fd, in_fd, offset, count)
+                if n == 0:
+                    break
+                offset += n
+                count -= n
+        except OSError:
+            pass
+
+    # 通用方式：读入预先分配的缓冲区再写出，循环中不再创建新的 bytes 对象
+    if count > 0:
+        buf = memoryview(bytearray(min(count, SPLIT_BUFFER_SIZE)))
+        with open(in_fd, 'rb', buffering=0, closefd=False) as src:
+            src.seek(offset)
+            while count > 0:
+                n = src.readinto(buf[:min(count, len(buf))])
+                if not n:
+                    break
+                _write_all(out_fd, buf[:n])
+                count -= n
+
+
+def _fast_copy(src, dst):
+    """
+    复制文件内容，依次尝试：reflink (FICLONE) → copy_file_range → shutil.copyfile
+    reflink 只复制元数据，与文件大小无关；copy_file_range 在内核中复制
+    """
+    binary = getattr(os, 'O_BINARY', 0)
+    src_fd = os.open(src, os.O_RDONLY | binary)
+    try:
+        dst_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | binary, 0o644)
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.ioctl(dst_fd, FICLONE, src_fd)
+                    return
+                except OSError:
+                    pass
+            if hasattr(os, 'copy_file_range'):
+                try:
+                    remaining = os.fstat(src_fd).st_size
+                    while remaining > 0:
+                        n = os.copy_file_range(src_fd, dst_fd, remaining)
+                        if n == 0:
+                            break
+                        remaining -= n
+                    if remaining == 0:
+                        return
+                except OSError:
+                    pass
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+    shutil.copyfile(src, dst)
+
+
+def _write_part(input_path, output_file, offset, count):
+    """把输入文件 [offset, offset + count) 范围的数据写入 output_file"""
+    binary = getattr(os, 'O_BINARY', 0)
+    # 每个线程使用自己的文件描述符，互不影响读取位置
+    in_fd = os.open(input_path, os.O_RDONLY | binary)
+    try:
+        out_fd = os.open(output_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | binary, 0o644)
+        try:
+            _copy_range(in_fd, out_fd, offset, count)
+        finally:
+            os.close(out_fd)
+    finally:
+        os.close(in_fd)
+
+
+def _binary_split(input_path, file_size, target_size_bytes, num_parts, name_fn):
+    """
+    按字节把文件切成 num_parts 份，每份 target_size_bytes 字节 (最后一份为剩余部分)
+    各分片的字节范围互不重叠，由线程池并发写入，充分利用磁盘的并行能力
+    :param input_path: 输入文件路径
+    :param file_size: 输入文件大小（字节）
+    :param target_size_bytes: 每份的大小（字节）
+    :param num_parts: 分割份数
+    :param name_fn: 根据序号 i 返回第 i 份输出文件路径的函数
+    :return: 分割后的文件列表
+    """
+    ranges = [(i, i * target_size_bytes, min(target_size_bytes, file_size - i * target_size_bytes))
+              for i in range(num_parts)]
+    ranges = [r for r in ranges if r[2] > 0]
+    output_files = [name_fn(i) for i, _, _ in ranges]
+
+    # 复制在系统调用中进行，期间释放 GIL，线程即可并行
+    with ThreadPoolExecutor(max_workers=max(1, min(SPLIT_PARALLELISM, len(ranges)))) as executor:
+        futures = [executor.submit(_write_part, input_path, output_file, offset, count)
+                   for output_file, (_, offset, count) in zip(output_files, ranges)]
+        for future in futures:
+            future.result()
+    return output_files
+
+
+def split_file_by_size(input_path, output_path, target_size_mb, output_format, known_size=None, max_parts=None):
     """
     根据指定大小分割文件
     :param input_path: 输入文件路径
     :param output_path: 输出目录
     :param target_size_mb: 目标文件大小（MB）
     :param output_format: 输出格式
+    :param known_size: 调用方已获取的输入文件大小（字节），传入时不再重复 stat
+    :param max_parts: 最多生成的分割文件数，None 表示全部生成
     :return: 分割后的文件列表
     """
     try:
-        # 检查文件是否存在
-        if not os.path.exists(input_path):
-            return {'success': False, 'error': '文件不存在'}
+        # 检查文件是否存在并获取大小
+        if known_size is None:
+            try:
+                known_size = os.path.getsize(input_path)
+            except OSError:
+                return {'success': False, 'error': '文件不存在'}
         
         # 获取文件名和扩展名
         file_name = os.path.basename(input_path)
@@ -140,17 +417,20 @@ def split_file_by_size(input_path, output_path, target_size_mb, output_format):
         # 创建唯一的输出目录
         unique_id = str(uuid.uuid4())
         split_output_dir = os.path.join(output_path, f"split_{unique_id}")
-        os.makedirs(split_output_dir, exist_ok=True)
+        os.mkdir(split_output_dir)  # UUID 保证目录名唯一
         
         # 计算分割点
-        file_size = os.path.getsize(input_path)
+        file_size = known_size
         target_size_bytes = int(target_size_mb * 1024 * 1024)  # MB转换为字节
         num_parts = math.ceil(file_size / target_size_bytes)
+        if max_parts is not None:
+            # 调用方只需要前几个部分时，后面的部分根本不生成
+            num_parts = min(num_parts, max_parts)
         
         # 如果文件小于目标大小，直接复制
         if file_size <= target_size_bytes:
             output_file = os.path.join(split_output_dir, f"{file_name_without_ext}.{output_format}")
-            shutil.copy2(input_path, output_file)
+            _fast_copy(input_path, output_file)
             return {
                 'success': True,
                 'files': [output_file],
@@ -158,25 +438,23 @@ def split_file_by_size(input_path, output_path, target_size_mb, output_format):
                 'message': '文件大小小于目标大小，已直接复制'
             }
         
+        # 文件名前缀和后缀只拼接一次
+        part_prefix = os.path.join(split_output_dir, f"{target_size_mb}M")
+        part_suffix = f".{output_format}"
+        
+        def part_path(i):
+            # 使用目标大小作为文件名，只对第一个文件不加序号
+            if i == 0:
+                return part_prefix + part_suffix
+            return f"{part_prefix}_part{i+1:03d}{part_suffix}"
+        
         # 分割文件
         output_files = []
         
         # 如果是视频或音频文件，使用二进制分割
         if file_type in ['video', 'audio']:
             # 直接按二进制分割，确保文件内容一致
-            with open(input_path, 'rb') as f:
-                for i in range(num_parts):
-                    # 使用目标大小作为文件名，只对第一个文件不加序号
-                    if i == 0:
-                        output_file = os.path.join(split_output_dir, f"{target_size_mb}M.{output_format}")
-                    else:
-                        output_file = os.path.join(split_output_dir, f"{target_size_mb}M_part{i+1:03d}.{output_format}")
-                    with open(output_file, 'wb') as out_f:
-                        chunk = f.read(target_size_bytes)
-                        if not chunk:
-                            break
-                        out_f.write(chunk)
-                    output_files.append(output_file)
+            output_files = _binary_split(input_path, file_size, target_size_bytes, num_parts, part_path)
         
         # 如果是图片文件，使用PIL库进行分割
         elif file_type == 'image':
@@ -193,108 +471,49 @@ def split_file_by_size(input_path, output_path, target_size_mb, output_format):
                     # 计算每个分割部分的目标大小（字节）
                     target_bytes = target_size_bytes
                     
-                    # 尝试不同的质量参数来达到目标大小
-                    quality = 85  # 初始质量
-                    temp_file = os.path.join(split_output_dir, "temp_test.jpg")
-                    
-                    # 先测试当前质量下的文件大小
-                    img.save(temp_file, format='JPEG', quality=quality)
-                    test_size = os.path.getsize(temp_file)
-                    
-                    # 调整质量以接近目标大小
-                    if test_size > target_bytes:
-                        # 如果太大，降低质量
-                        while test_size > target_bytes and quality > 10:
-                            quality -= 5
-                            img.save(temp_file, format='JPEG', quality=quality)
-                            test_size = os.path.getsize(temp_file)
-                    elif test_size < target_bytes * 0.8:
-                        # 如果太小，提高质量
-                        while test_size < target_bytes * 0.8 and quality < 95:
-                            quality += 5
-                            img.save(temp_file, format='JPEG', quality=quality)
-                            test_size = os.path.getsize(temp_file)
+                    # 二分查找不超过目标大小的最高质量，约 7 次编码即可收敛
+                    # (在内存中编码，不写临时文件；同一个缓冲区清空后重复使用)
+                    buf = io.BytesIO()
+                    lo, hi = 10, 95
+                    quality = lo
+                    while lo <= hi:
+                        mid = (lo + hi) // 2
+                        buf.seek(0)
+                        buf.truncate()
+                        img.save(buf, format='JPEG', quality=mid)
+                        if buf.tell() > target_bytes:
+                            hi = mid - 1
+                        else:
+                            quality = mid
+                            lo = mid + 1
                     
-                    # 删除临时文件
-                    if os.path.exists(temp_file):
-                        os.remove(temp_file)
+                    # 按计算出的质量只编码一次，再把同一份数据写入每个部分
+                    # (PIL 只认 JPEG 这个格式名，jpg 需要转换)
+                    save_format = 'JPEG' if output_format.lower() == 'jpg' else output_format.upper()
+                    buf.seek(0)
+                    buf.truncate()
+                    img.save(buf, format=save_format, quality=quality)
+                    payload = buf.getvalue()
                     
                     # 分割图片为多个部分
                     for i in range(num_parts):
-                        # 使用目标大小作为文件名，只对第一个文件不加序号
-                        if i == 0:
-                            output_file = os.path.join(split_output_dir, f"{target_size_mb}M.{output_format}")
-                        else:
-                            output_file = os.path.join(split_output_dir, f"{target_size_mb}M_part{i+1:03d}.{output_format}")
-                        
-                        # 保存每个部分，使用计算出的质量
-                        img.save(output_file, format=output_format.upper(), quality=quality)
+                        output_file = part_path(i)
+                        Path(output_file).write_bytes(payload)
                         output_files.append(output_file)
                         
-            except ImportError:
-                # 如果PIL库不可用，回退到二进制分割
-                with open(input_path, 'rb') as f:
-                    for i in range(num_parts):
-                        # 使用目标大小作为文件名，只对第一个文件不加序号
-                        if i == 0:
-                            output_file = os.path.join(split_output_dir, f"{target_size_mb}M.{output_format}")
-                        else:
-                            output_file = os.path.join(split_output_dir, f"{target_size_mb}M_part{i+1:03d}.{output_format}")
-                        with open(output_file, 'wb') as out_f:
-                            chunk = f.read(target_size_bytes)
-                            if not chunk:
-                                break
-                            out_f.write(chunk)
-                        output_files.append(output_file)
-            except Exception as e:
-                # 如果图片处理失败，回退到二进制分割
-                with open(input_path, 'rb') as f:
-                    for i in range(num_parts):
-                        # 使用目标大小作为文件名，只对第一个文件不加序号
-                        if i == 0:
-                            output_file = os.path.join(split_output_dir, f"{target_size_mb}M.{output_format}")
-                        else:
-                            output_file = os.path.join(split_output_dir, f"{target_size_mb}M_part{i+1:03d}.{output_format}")
-                        with open(output_file, 'wb') as out_f:
-                            chunk = f.read(target_size_bytes)
-                            if not chunk:
-                                break
-                            out_f.write(chunk)
-                        output_files.append(output_file)
+            except Exception:
+                # PIL库不可用 (ImportError) 或图片处理失败时，回退到二进制分割
+                output_files = _binary_split(input_path, file_size, target_size_bytes, num_parts, part_path)
         
         # 如果是文档文件，使用二进制分割以保持文件结构完整性
         elif file_type == 'document':
             # 按二进制分割，确保文档结构完整性
-            with open(input_path, 'rb') as f:
-                for i in range(num_parts):
-                    # 使用目标大小作为文件名，只对第一个文件不加序号
-                    if i == 0:
-                        output_file = os.path.join(split_output_dir, f"{target_size_mb}M.{output_format}")
-                    else:
-                        output_file = os.path.join(split_output_dir, f"{target_size_mb}M_part{i+1:03d}.{output_format}")
-                    with open(output_file, 'wb') as out_f:
-                        chunk = f.read(target_size_bytes)
-                        if not chunk:
-                            break
-                        out_f.write(chunk)
-                    output_files.append(output_file)
+            output_files = _binary_split(input_path, file_size, target_size_bytes, num_parts, part_path)
         
         # 其他文件类型，按二进制分割
         else:
             # 按二进制分割
-            with open(input_path, 'rb') as f:
-                for i in range(num_parts):
-                    # 使用目标大小作为文件名，只对第一个文件不加序号
-                    if i == 0:
-                        output_file = os.path.join(split_output_dir, f"{target_size_mb}M.{output_format}")
-                    else:
-                        output_file = os.path.join(split_output_dir, f"{target_size_mb}M_part{i+1:03d}.{output_format}")
-                    with open(output_file, 'wb') as out_f:
-                        chunk = f.read(target_size_bytes)
-                        if not chunk:
-                            break
-                        out_f.write(chunk)
-                    output_files.append(output_file)
+            output_files = _binary_split(input_path, file_size, target_size_bytes, num_parts, part_path)
         
         return {
             'success': True,
@@ -313,6 +532,107 @@ def split_file_by_size(input_path, output_path, target_size_mb, output_format):
         }
 
 
+@functools.lru_cache(maxsize=None)
+def find_tool(name):
+    """
+    查找外部命令 (ffmpeg/ffprobe) 的完整路径，每个进程只遍历一次 PATH，不启动子进程
+    :return: 可执行文件路径，找不到时返回 None
+    """
+    return shutil.which(name)
+
+
+@functools.lru_cache(maxsize=64)
+def _probe_duration_cached(path, mtime_ns):
+    if av is not None:
+        try:
+            with av.open(path) as container:
+                if container.duration is not None:
+                    return container.duration / av.time_base
+        except (av.FFmpegError, OSError):
+            pass  # PyAV 无法解析时交给 ffprobe
+    
+    ffprobe = find_tool('ffprobe')
+    if ffprobe is None:
+        return None
+    cmd = [ffprobe, '-v', 'error', '-print_format', 'json', '-show_format', path]
+    try:
+        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+        return float(json.loads(result.stdout)['format']['duration'])
+    except (subprocess.CalledProcessError, FileNotFoundError, ValueError, KeyError):
+        return None
+
+
+def _probe_duration(path):
+    """
+    获取音视频文件的时长（秒），失败时返回 None
+    结果按 (路径, 修改时间) 缓存，同一文件在一次请求内只启动一次 ffprobe
+    """
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    return _probe_duration_cached(path, mtime_ns)
+
+
+def _remux_head_with_av(input_path, output_path, duration):
+    """
+    用 PyAV 在进程内把输入文件开头 duration 秒的数据包原样写入 output_path (等同于 -c copy)
+    :return: 是否成功
+    """
+    try:
+        with av.open(input_path) as src, av.open(output_path, 'w') as dst:
+            streams = [stream for stream in src.streams if stream.type in ('video', 'audio')]
+            out_streams = {stream.index: dst.add_stream_from_template(stream) for stream in streams}
+            finished = set()
+            for packet in src.demux(streams):
+                # demux 结束时会产生不含数据的空包
+                if packet.dts is None:
+                    continue
+                index = packet.stream.index
+                if packet.pts is not None and packet.pts * packet.time_base > duration:
+                    # 所有流都超过截取时长后即可停止读取
+                    finished.add(index)
+                    if len(finished) == len(streams):
+                        break
+                    continue
+                packet.stream = out_streams[index]
+                dst.mux(packet)
+        return True
+    except (av.FFmpegError, OSError, ValueError):
+        return False
+
+
+def _trim_media(input_path, output_path, duration, encode_args):
+    """
+    截取输入文件开头 duration 秒写入 output_path
+    先尝试直接复制码流 (-c copy，不重新编码，几乎瞬间完成且画质无损)，
+    输出容器不支持原编码时再按 encode_args 重新编码
+    :param encode_args: 重新编码时的编码器参数，如 ['-acodec', 'aac']
+    :return: 是否成功
+    """
+    if av is not None and _remux_head_with_av(input_path, output_path, duration):
+        return True
+    
+    ffmpeg = find_tool('ffmpeg')
+    if ffmpeg is None:
+        return False
+    
+    copy_cmd = [ffmpeg, '-ss', '0', '-i', input_path, '-t', str(duration),
+                '-c', 'copy', '-avoid_negative_ts', 'make_zero']
+    if output_path.lower().endswith(('.mp4', '.mov', '.m4a')):
+        copy_cmd += ['-movflags', '+faststart']
+    copy_cmd += ['-y', output_path]
+    encode_cmd = [ffmpeg, '-i', input_path, '-t', str(duration)] + encode_args + ['-y', output_path]
+    
+    for cmd in (copy_cmd, encode_cmd):
+        try:
+            subprocess.run(cmd, check=True, capture_output=True, text=True)
+            return True
+        except subprocess.CalledProcessError:
+            continue
+    return False
+
+
 def adjust_split_size(file1_path, file2_path, target_size_bytes, input_path, output_format):
     """
     调整分割后的文件大小，使其更接近目标大小
@@ -330,96 +650,55 @@ def adjust_split_size(file1_path, file2_path, target_size_bytes, input_path, out
     if 0.9 * target_size_bytes <= file1_size <= 1.1 * target_size_bytes:
         return [file1_path, file2_path]
     
+    # 各分支共用的文件类型和调整后的文件路径，只计算一次
+    file_type = get_file_type(input_path)
+    name_without_ext = os.path.splitext(os.path.basename(input_path))[0]
+    new_file1 = os.path.join(os.path.dirname(file1_path), f"{name_without_ext}_part1_adj.{output_format.lower()}")
+    
+    # 无法直接复制码流时使用的编码器
+    is_mp4 = output_format.lower() in ['mp4', 'mov']
+    video_encode_args = ['-c:v', 'libx264' if is_mp4 else 'libxvid', '-c:a', 'aac' if is_mp4 else 'mp3']
+    audio_encode_args = ['-acodec', get_audio_codec(output_format)]
+    
     # 如果第一个文件太小，需要增加时长
     if file1_size < 0.9 * target_size_bytes:
         # 计算需要增加的时长比例
         ratio = target_size_bytes / file1_size
         
         # 获取原始视频/音频总时长
-        cmd_duration = [
-            'ffprobe', '-v', 'error', '-show_entries', 'format=duration', 
-            '-of', 'default=noprint_wrappers=1:nokey=1', input_path
-        ]
-        
-        try:
-            duration_result = subprocess.run(cmd_duration, check=True, capture_output=True, text=True)
-            total_duration = float(duration_result.stdout.strip())
-        except (subprocess.CalledProcessError, ValueError):
+        total_duration = _probe_duration(input_path)
+        if total_duration is None:
             return [file1_path, file2_path]  # 如果获取时长失败，返回原文件
         
         # 计算新的目标时长
-        file_type = get_file_type(input_path)
         if file_type == 'video':
             # 获取第一个文件的时长
-            cmd_file1_duration = [
-                'ffprobe', '-v', 'error', '-show_entries', 'format=duration', 
-                '-of', 'default=noprint_wrappers=1:nokey=1', file1_path
-            ]
-            
-            try:
-                file1_duration_result = subprocess.run(cmd_file1_duration, check=True, capture_output=True, text=True)
-                file1_duration = float(file1_duration_result.stdout.strip())
-            except (subprocess.CalledProcessError, ValueError):
+            file1_duration = _probe_duration(file1_path)
+            if file1_duration is None:
                 return [file1_path, file2_path]
             
             # 计算新的时长
             new_duration = min(file1_duration * ratio, total_duration)
             
             # 重新生成第一个文件
-            dir_path = os.path.dirname(file1_path)
-            filename = os.path.basename(input_path)
-            name_without_ext = os.path.splitext(filename)[0]
-            new_file1 = os.path.join(dir_path, f"{name_without_ext}_part1_adj.{output_format.lower()}")
-            
-            cmd = [
-                'ffmpeg', '-i', input_path,
-                '-t', str(new_duration),
-                '-c:v', 'libx264' if output_format.lower() in ['mp4', 'mov'] else 'libxvid',
-                '-c:a', 'aac' if output_format.lower() in ['mp4', 'mov'] else 'mp3',
-                '-y', new_file1
-            ]
-            
-            try:
-                subprocess.run(cmd, check=True, capture_output=True, text=True)
-                # 删除旧文件
-                os.remove(file1_path)
-                file1_path = new_file1
-            except subprocess.CalledProcessError:
+            if not _trim_media(input_path, new_file1, new_duration, video_encode_args):
                 return [file1_path, file2_path]  # 如果调整失败，返回原文件
+            # 删除旧文件
+            os.remove(file1_path)
+            file1_path = new_file1
         
         elif file_type == 'audio':
             # 类似视频的处理方式
-            cmd_file1_duration = [
-                'ffprobe', '-v', 'error', '-show_entries', 'format=duration', 
-                '-of', 'default=noprint_wrappers=1:nokey=1', file1_path
-            ]
-            
-            try:
-                file1_duration_result = subprocess.run(cmd_file1_duration, check=True, capture_output=True, text=True)
-                file1_duration = float(file1_duration_result.stdout.strip())
-            except (subprocess.CalledProcessError, ValueError):
+            file1_duration = _probe_duration(file1_path)
+            if file1_duration is None:
                 return [file1_path, file2_path]
             
             new_duration = min(file1_duration * ratio, total_duration)
             
-            dir_path = os.path.dirname(file1_path)
-            filename = os.path.basename(input_path)
-            name_without_ext = os.path.splitext(filename)[0]
-            new_file1 = os.path.join(dir_path, f"{name_without_ext}_part1_adj.{output_format.lower()}")
-            
-            cmd = [
-                'ffmpeg', '-i', input_path,
-                '-t', str(new_duration),
-                '-acodec', get_audio_codec(output_format),
-                '-y', new_file1
-            ]
-            
-            try:
-                subprocess.run(cmd, check=True, capture_output=True, text=True)
-                os.remove(file1_path)
-                file1_path = new_file1
-            except subprocess.CalledProcessError:
+            if not _trim_media(input_path, new_file1, new_duration, audio_encode_args):
                 return [file1_path, file2_path]
+            os.remove(file1_path)
+            file1_path = new_file1
     
     # 如果第一个文件太大，需要减少时长
     elif file1_size > 1.1 * target_size_bytes:
@@ -427,72 +706,167 @@ def adjust_split_size(file1_path, file2_path, target_size_bytes, input_path, out
         ratio = target_size_bytes / file1_size
         
         # 获取第一个文件的时长
-        cmd_file1_duration = [
-            'ffprobe', '-v', 'error', '-show_entries', 'format=duration', 
-            '-of', 'default=noprint_wrappers=1:nokey=1', file1_path
-        ]
-        
-        try:
-            file1_duration_result = subprocess.run(cmd_file1_duration, check=True, capture_output=True, text=True)
-            file1_duration = float(file1_duration_result.stdout.strip())
-        except (subprocess.CalledProcessError, ValueError):
+        file1_duration = _probe_duration(file1_path)
+        if file1_duration is None:
             return [file1_path, file2_path]
         
         # 计算新的时长
         new_duration = file1_duration * ratio
         
         # 重新生成第一个文件
-        dir_path = os.path.dirname(file1_path)
-        filename = os.path.basename(input_path)
-        name_without_ext = os.path.splitext(filename)[0]
-        new_file1 = os.path.join(dir_path, f"{name_without_ext}_part1_adj.{output_format.lower()}")
-        
-        file_type = get_file_type(input_path)
         if file_type == 'video':
-            cmd = [
-                'ffmpeg', '-i', input_path,
-                '-t', str(new_duration),
-                '-c:v', 'libx264' if output_format.lower() in ['mp4', 'mov'] else 'libxvid',
-                '-c:a', 'aac' if output_format.lower() in ['mp4', 'mov'] else 'mp3',
-                '-y', new_file1
-            ]
+            encode_args = video_encode_args
         elif file_type == 'audio':
-            cmd = [
-                'ffmpeg', '-i', input_path,
-                '-t', str(new_duration),
-                '-acodec', get_audio_codec(output_format),
-                '-y', new_file1
-            ]
+            encode_args = audio_encode_args
         else:
             return [file1_path, file2_path]
         
-        try:
-            subprocess.run(cmd, check=True, capture_output=True, text=True)
-            os.remove(file1_path)
-            file1_path = new_file1
-        except subprocess.CalledProcessError:
+        if not _trim_media(input_path, new_file1, new_duration, encode_args):
             return [file1_path, file2_path]  # 如果调整失败，返回原文件
+        os.remove(file1_path)
+        file1_path = new_file1
     
     return [file1_path, file2_path]
 
 
 def get_audio_codec(format_name):
     """根据格式获取音频编码器"""
-    format_name = format_name.lower()
-    if format_name in ['mp3']:
-        return 'libmp3lame'
-    elif format_name in ['aac', 'mp4', 'mov', 'm4a']:
-        return 'aac'
-    elif format_name in ['wav']:
-        return 'pcm_s16le'
-    elif format_name in ['flac']:
-        return 'flac'
-    elif format_name in ['ogg']:
-        return 'libvorbis'
-    elif format_name in ['wma']:
-        return 'wmav2'
+    return _AUDIO_CODEC.get(format_name.lower(), 'libmp3lame')  # 默认使用mp3编码
+
+
+def split_and_keep_first(file_path, target_size, output_format, file_size):
+    """
+    执行分割，只保留第一个分割文件
+    :return: 与 /perform_split 接口相同结构的结果字典
+    """
+    # 只生成第一个分割文件，其余部分不写入磁盘
+    result = split_file_by_size(file_path, app.config['OUTPUT_FOLDER'], target_size, output_format,
+                                known_size=file_size, max_parts=1)
+
+    if result['success']:
+        files_to_keep = result['files']
+
+        # 一次 scandir 取得分割目录中剩余文件的大小，不再逐个 stat
+        with os.scandir(result['split_dir']) as entries:
+            split_sizes = {entry.name: entry.stat().st_size for entry in entries if entry.is_file()}
+
+        # 获取保留文件的信息
+        files_info = []
+        for file_path in files_to_keep:
+            name = os.path.basename(file_path)
+            if name in split_sizes:
+                files_info.append({
+                    'path': file_path,
+                    'name': name,
+                    'size_mb': round(get_file_size_mb(split_sizes[name]), 2),
+                    'type': get_file_type(file_path)
+                })
+
+        return {
+            'success': True,
+            'files': files_info,
+            'split_dir': result['split_dir'],
+            'message': '已生成第一个分割文件'
+        }
     else:
-        return 'libmp3lame'  # 默认使用mp3编码
+        return result
+
+
+def generate_and_rename(category, size_mb, extension, document_type):
+    """
+    调用 addfile 中的生成模块生成文件，并按请求的后缀重命名
+    :return: 与 /generate_file 接口相同结构的结果字典
+    """
+    label = _CATEGORY_LABELS[category]
+    generator = GENERATORS.get((category, document_type if category == 'document' else None))
+    if generator is None:
+        return {'success': False, 'message': f'不支持的文档类型: {document_type}'}
+    module_name, func_name, default_ext = generator
+
+    # 先按默认格式生成，再按请求的后缀重命名
+    temp_file_path = os.path.join(app.config['OUTPUT_FOLDER'], f"{size_mb}MM.{default_ext}")
+    try:
+        # 模块导入后缓存在 sys.modules 中，之后的请求只是一次字典查找
+        generate = getattr(importlib.import_module(module_name), func_name)
+    except ImportError as e:
+        return {'success': False, 'message': f'导入{label}生成模块失败: {str(e)}'}
+
+    try:
+        generate(temp_file_path, size_mb)
+    except Exception as e:
+        return {'success': False, 'message': f'{label}生成过程中出错: {str(e)}'}
+    if not os.path.exists(temp_file_path):
+        return {'success': False, 'message': f'{label}文件生成失败'}
+
+    # 根据后缀名大小写规则生成最终文件名
+    # 如果后缀是全大写 (如 PNG)，则文件名变为 10M1.PNG
+    # 如果后缀是小写 (如 png)，则文件名保持 10M.png
+    final_filename = f"{size_mb}{'M1' if extension.isupper() else 'M'}.{extension}"
+    final_file_path = os.path.join(app.config['OUTPUT_FOLDER'], final_filename)
+
+    # 生成的文件和最终文件都在 OUTPUT_FOLDER 下，同一文件系统内 os.replace 是原子操作，
+    # 目标文件已存在时直接覆盖，不需要先删除，也不会退化成整份数据复制
+    if temp_file_path != final_file_path:
+        try:
+            os.replace(temp_file_path, final_file_path)
+        except OSError as e:
+            return {'success': False, 'message': f'修改文件后缀失败: {str(e)}'}
+
+    # 获取最终文件信息
+    file_size_mb = round(get_file_size_mb(final_file_path), 2)
+
+    # 返回成功结果
+    return {
+        'success': True,
+        'file_name': final_filename,
+        'file_path': final_file_path,
+        'file_size_mb': file_size_mb,
+        'file_type': category,
+        'download_url': f'/download_file?path={final_file_path}'
+    }
+
+
+# 后台任务：耗时的分割/生成放到线程池中执行，请求立即返回 job_id，前端通过 /job/<job_id> 轮询结果
+# 任务表保存在进程内存中，多进程部署时需要保证轮询请求落在同一进程 (见 wsgi.py)
+_job_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS)
+_jobs = {}
+
+
+def _mark_job_finished(future):
+    future.finished_at = time.monotonic()
+
+
+def _evict_expired_jobs():
+    """清理完成后超过 JOB_RESULT_TTL 仍未被取走的任务，避免 _jobs 无限增长"""
+    deadline = time.monotonic() - JOB_RESULT_TTL
+    for job_id, future in list(_jobs.items()):
+        if getattr(future, 'finished_at', deadline) < deadline:
+            _jobs.pop(job_id, None)
+
+
+def _run_job_safely(func, *args):
+    try:
+        return func(*args)
+    except Exception as e:
+        print(f"后台任务出错: {str(e)}")
+        return {'success': False, 'message': f'处理过程中发生错误: {str(e)}'}
+
+
+def run_job(func, *args):
+    """
+    执行耗时操作并返回响应：默认同步执行并直接返回结果；
+    请求带 ?async=1 时提交到后台线程池，立即返回 202 和 job_id
+    :param func: 返回结果字典的函数
+    """
+    if request.args.get('async') != '1':
+        return ojson(func(*args))
+    
+    _evict_expired_jobs()
+    job_id = str(uuid.uuid4())
+    future = _job_executor.submit(_run_job_safely, func, *args)
+    future.add_done_callback(_mark_job_finished)
+    _jobs[job_id] = future
+    return ojson({'success': True, 'job_id': job_id, 'status': 'running'}), 202
 
 
 # 主页路由 - 显示功能选择页面
@@ -518,155 +892,146 @@ def generate():
 @app.route('/upload', methods=['POST'])
 def upload_file():
     """处理文件上传"""
-    try:
-        if 'file' not in request.files:
-            return jsonify({'success': False, 'message': '没有选择文件'})
+    if 'file' not in request.files:
+        return ojson({'success': False, 'message': '没有选择文件'})
+    
+    file = request.files['file']
+    if file.filename == '':
+        return ojson({'success': False, 'message': '没有选择文件'})
+    
+    if file and allowed_file(file.filename):
+        # 生成安全的文件名
+        filename = secure_filename(file.filename)
         
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({'success': False, 'message': '没有选择文件'})
+        # 添加UUID前缀避免文件名冲突
+        unique_filename = f"{uuid.uuid4()}_{filename}"
+        file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
         
-        if file and allowed_file(file.filename):
-            # 生成安全的文件名
-            try:
-                filename = secure_filename(file.filename)
-            except Exception as e:
-                return jsonify({'success': False, 'message': f'文件名处理失败: {str(e)}'})
-            
-            # 添加UUID前缀避免文件名冲突
-            unique_filename = f"{uuid.uuid4()}_{filename}"
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-            
-            # 确保上传目录存在
-            os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-            
-            # 保存文件
-            try:
-                file.save(file_path)
-            except Exception as e:
-                return jsonify({'success': False, 'message': f'文件保存失败: {str(e)}'})
-            
-            # 获取文件信息
-            try:
-                file_size = get_file_size_mb(file_path)
-                file_type = get_file_type(filename)
-            except Exception as e:
-                # 如果获取文件信息失败，删除已上传的文件
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                return jsonify({'success': False, 'message': f'获取文件信息失败: {str(e)}'})
-            
-            return jsonify({
-                'success': True,
-                'file_path': file_path,
-                'filename': filename,
-                'file_size_mb': round(file_size, 2),
-                'file_type': file_type
-            })
-        else:
-            return jsonify({'success': False, 'message': '不支持的文件格式'})
+        # 保存文件
+        try:
+            save_upload(file, file_path)
+        except Exception as e:
+            return ojson({'success': False, 'message': f'文件保存失败: {str(e)}'})
+        
+        # 获取文件信息
+        try:
+            file_size = get_file_size_mb(file_path)
+            file_type = get_file_type(filename)
+        except Exception as e:
+            # 如果获取文件信息失败，删除已上传的文件
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            return ojson({'success': False, 'message': f'获取文件信息失败: {str(e)}'})
+        
+        return ojson({
+            'success': True,
+            'file_path': file_path,
+            'filename': filename,
+            'file_size_mb': round(file_size, 2),
+            'file_type': file_type
+        })
+    else:
+        return ojson({'success': False, 'message': '不支持的文件格式'})
+
+
+@app.route('/upload_stream', methods=['POST'])
+def upload_stream():
+    """
+    流式上传：请求体就是文件内容，文件名通过 X-Filename 请求头传递 (URL 编码)
+    数据边读边写入目标文件，不经过表单解析和临时文件
+    """
+    original_name = unquote(request.headers.get('X-Filename', ''))
+    if not original_name:
+        return ojson({'success': False, 'message': '没有选择文件'})
+    
+    if not allowed_file(original_name):
+        return ojson({'success': False, 'message': '不支持的文件格式'})
+    
+    filename = secure_filename(original_name)
+    unique_filename = f"{uuid.uuid4()}_{filename}"
+    file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
+    
+    # 分块写入，每次 4MB
+    fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+    try:
+        while True:
+            chunk = request.stream.read(4 * 1024 * 1024)
+            if not chunk:
+                break
+            _write_all(fd, chunk)
     except Exception as e:
-        # 记录错误到控制台
-        print(f"上传文件时发生错误: {str(e)}")
-        return jsonify({'success': False, 'message': f'上传过程中发生错误: {str(e)}'})
+        os.close(fd)
+        os.remove(file_path)
+        return ojson({'success': False, 'message': f'文件保存失败: {str(e)}'})
+    os.close(fd)
+    
+    return ojson({
+        'success': True,
+        'file_path': file_path,
+        'filename': filename,
+        'file_size_mb': round(get_file_size_mb(file_path), 2),
+        'file_type': get_file_type(original_name)
+    })
 
 
 @app.route('/perform_split', methods=['POST'])
 def split_file():
     """处理文件分割请求"""
-    try:
-        # 检查是新上传的文件还是已上传的文件
-        if 'uploaded_file_path' in request.form:
-            # 使用已上传的文件
-            file_path = request.form.get('uploaded_file_path')
-            file_name = request.form.get('file_name')
-            
-            if not file_path or not os.path.exists(file_path):
-                return jsonify({'success': False, 'message': '文件不存在'})
-                
-            file_size = os.path.getsize(file_path)
-        else:
-            # 新上传的文件
-            if 'file' not in request.files:
-                return jsonify({'success': False, 'message': '没有选择文件'})
-                
-            file = request.files['file']
-            if file.filename == '':
-                return jsonify({'success': False, 'message': '没有选择文件'})
-                
-            # 保存上传的文件
-            filename = secure_filename(file.filename)
-            unique_filename = f"{uuid.uuid4()}_{filename}"
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-            file.save(file_path)
-            file_size = os.path.getsize(file_path)
-            file_name = file.filename
-        
-        # 获取分割参数
-        target_size = float(request.form.get('target_size_mb'))
-        output_format = request.form.get('output_format')
-        
-        if not target_size or not output_format:
-            return jsonify({'success': False, 'message': '缺少必要参数'})
-        
-        # 检查目标大小是否合理
-        file_size_mb = get_file_size_mb(file_path)
-        if target_size >= file_size_mb:
-            return jsonify({'success': False, 'message': '目标大小不能大于或等于原文件大小'})
-        
-        # 确保输出目录存在
-        os.makedirs(app.config['OUTPUT_FOLDER'], exist_ok=True)
-        
-        # 执行分割
-        result = split_file_by_size(file_path, app.config['OUTPUT_FOLDER'], target_size, output_format)
-        
-        if result['success']:
-            # 只保留第一个分割文件，删除其余文件
-            files_to_keep = []
-            files_to_delete = []
+    # 先检查分割参数，参数不合法时不必保存上传的文件 (直接检查格式，不用异常处理非法输入)
+    target_size = request.form.get('target_size_mb', '')
+    output_format = request.form.get('output_format')
+    
+    # isdigit 对 '²' 等 Unicode 数字也返回 True，但 float() 不接受，所以限定为 ASCII
+    if not (target_size.isascii() and target_size.replace('.', '', 1).isdigit()) or not output_format:
+        return ojson({'success': False, 'message': '缺少必要参数'})
+    
+    target_size = float(target_size)
+    if not target_size:
+        return ojson({'success': False, 'message': '缺少必要参数'})
+    
+    if output_format.lower() not in _OUTPUT_EXTS:
+        return ojson({'success': False, 'message': '不支持的输出格式'})
+    
+    # 检查是新上传的文件还是已上传的文件
+    if 'uploaded_file_path' in request.form:
+        # 使用已上传的文件
+        file_path = request.form.get('uploaded_file_path')
+        file_name = request.form.get('file_name')
+        
+        if not file_path or not os.path.exists(file_path):
+            return ojson({'success': False, 'message': '文件不存在'})
             
-            if result['files']:
-                # 保留第一个文件
-                first_file = result['files'][0]
-                if os.path.exists(first_file):
-                    files_to_keep.append(first_file)
-                
-                # 收集需要删除的文件（除第一个外的所有文件）
-                for file_path in result['files'][1:]:
-                    if os.path.exists(file_path):
-                        files_to_delete.append(file_path)
-                
-                # 删除多余的文件
-                for file_path in files_to_delete:
-                    try:
-                        os.remove(file_path)
-                        print(f"已删除多余的分割文件: {file_path}")
-                    except Exception as e:
-                        print(f"删除文件失败 {file_path}: {str(e)}")
+        file_size = os.path.getsize(file_path)
+    else:
+        # 新上传的文件
+        if 'file' not in request.files:
+            return ojson({'success': False, 'message': '没有选择文件'})
             
-            # 获取保留文件的信息
-            files_info = []
-            for file_path in files_to_keep:
-                if os.path.exists(file_path):
-                    files_info.append({
-                        'path': file_path,
-                        'name': os.path.basename(file_path),
-                        'size_mb': round(get_file_size_mb(file_path), 2),
-                        'type': get_file_type(file_path)
-                    })
+        file = request.files['file']
+        if file.filename == '':
+            return ojson({'success': False, 'message': '没有选择文件'})
+        
+        # 上传内容此时还在临时文件中，先按它的大小检查目标大小，不合理时不保存
+        # (请求结束时临时文件会被自动清理)
+        file_size = file.stream.seek(0, os.SEEK_END)
+        file.stream.seek(0)
+        if target_size >= get_file_size_mb(file_size):
+            return ojson({'success': False, 'message': '目标大小不能大于或等于原文件大小'})
             
-            return jsonify({
-                'success': True,
-                'files': files_info,
-                'split_dir': result['split_dir'],
-                'message': '已保留第一个分割文件，删除其余文件'
-            })
-        else:
-            return jsonify(result)
-    except Exception as e:
-        # 记录错误到控制台
-        print(f"分割文件时发生错误: {str(e)}")
-        return jsonify({'success': False, 'message': f'分割过程中发生错误: {str(e)}'})
+        # 保存上传的文件
+        filename = secure_filename(file.filename)
+        unique_filename = f"{uuid.uuid4()}_{filename}"
+        file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
+        save_upload(file, file_path)
+        file_name = file.filename
+    
+    # 检查目标大小是否合理
+    file_size_mb = get_file_size_mb(file_size)
+    if target_size >= file_size_mb:
+        return ojson({'success': False, 'message': '目标大小不能大于或等于原文件大小'})
+    
+    # 执行分割 (耗时操作，请求带 ?async=1 时放到后台任务中执行)
+    return run_job(split_and_keep_first, file_path, target_size, output_format, file_size)
 
 
 
@@ -674,51 +1039,54 @@ def split_file():
 
 @app.route('/list_upload_files')
 def list_upload_files():
-    """列出上传目录中的所有文件"""
+    """列出上传目录中的所有文件 (边遍历边输出，不必等整个目录遍历完再开始响应)"""
+    upload_folder = app.config['UPLOAD_FOLDER']
     try:
-        upload_folder = app.config['UPLOAD_FOLDER']
-        files = []
-        
-        # 遍历上传目录
-        for filename in os.listdir(upload_folder):
-            file_path = os.path.join(upload_folder, filename)
-            
-            # 只处理文件，跳过目录
-            if os.path.isfile(file_path):
-                # 获取文件信息
-                file_size = os.path.getsize(file_path)
-                file_ext = os.path.splitext(filename)[1].lower()
-                
-                # 确定文件类型
-                file_type = 'unknown'
-                if file_ext in ['.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv']:
-                    file_type = 'video'
-                elif file_ext in ['.mp3', '.wav', '.flac', '.aac', '.ogg']:
-                    file_type = 'audio'
-                elif file_ext in ['.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff']:
-                    file_type = 'image'
-                elif file_ext in ['.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.txt', '.rtf', '.odt', '.ods', 'odp', 'csv', '.html', '.htm', '.xml']:
-                    file_type = 'document'
-                
-                # 添加到文件列表
-                files.append({
-                    'name': filename,
-                    'path': file_path,
-                    'size': file_size,
-                    'type': file_type
-                })
-        
-        return jsonify({
-            'success': True,
-            'files': files
-        })
-        
+        entries = os.scandir(upload_folder)
     except Exception as e:
         app.logger.error(f"列出上传文件时出错: {str(e)}")
-        return jsonify({
+        return ojson({
             'success': False,
             'message': f'获取文件列表失败: {str(e)}'
         })
+    
+    def generate():
+        # 遍历上传目录 (scandir 的目录项自带文件类型和 stat 结果，不必逐个再查询)
+        with entries:
+            yield b'{"success":true,"files":['
+            separator = b''
+            for entry in entries:
+                # 只处理文件，跳过目录和上传中的临时文件
+                if not entry.is_file(follow_symlinks=False) or entry.name.startswith(UPLOAD_TEMP_PREFIX):
+                    continue
+                try:
+                    size = entry.stat().st_size
+                except FileNotFoundError:
+                    continue  # 遍历过程中被删除
+                
+                yield separator + _dumps({
+                    'name': entry.name,
+                    'path': os.path.join(upload_folder, entry.name),
+                    'size': size,
+                    'type': get_file_type(entry.name) or 'unknown'
+                })
+                separator = b','
+            yield b']}'
+    
+    return app.response_class(generate(), mimetype='application/json')
+
+
+def _remove_dir_if_empty(dir_path):
+    """
+    删除文件后顺带删除空的父目录 (上传/输出的顶层目录除外)
+    直接尝试 rmdir，目录非空或已不存在时会失败，不需要先 exists + listdir
+    """
+    if os.path.abspath(dir_path) in _PROTECTED_DIRS:
+        return
+    try:
+        os.rmdir(dir_path)
+    except OSError:
+        pass
 
 
 @app.route('/delete', methods=['POST'])
@@ -727,24 +1095,19 @@ def delete_file():
     data = request.get_json()
     
     if not data or 'file_path' not in data:
-        return jsonify({'success': False, 'message': '缺少文件路径参数'})
+        return ojson({'success': False, 'message': '缺少文件路径参数'})
     
     file_path = data['file_path']
     
     try:
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            
-            # 检查是否为空目录，如果是则删除
-            parent_dir = os.path.dirname(file_path)
-            if os.path.exists(parent_dir) and not os.listdir(parent_dir):
-                os.rmdir(parent_dir)
-                
-            return jsonify({'success': True})
-        else:
-            return jsonify({'success': False, 'message': '文件不存在'})
+        os.remove(file_path)
+    except FileNotFoundError:
+        return ojson({'success': False, 'message': '文件不存在'})
     except Exception as e:
-        return jsonify({'success': False, 'message': str(e)})
+        return ojson({'success': False, 'message': str(e)})
+    
+    _remove_dir_if_empty(os.path.dirname(file_path))
+    return ojson({'success': True})
 
 
 @app.route('/generate_file', methods=['POST'])
@@ -755,7 +1118,7 @@ def generate_file():
         data = request.get_json()
         
         if not data:
-            return jsonify({'success': False, 'message': '请求数据为空'})
+            return ojson({'success': False, 'message': '请求数据为空'})
         
         category = data.get('category')
         size_mb = data.get('size_mb')
@@ -769,163 +1132,58 @@ def generate_file():
             if size_mb.is_integer():
                 size_mb = int(size_mb)
         except (ValueError, TypeError):
-            return jsonify({'success': False, 'message': '文件大小必须是数字'})
+            return ojson({'success': False, 'message': '文件大小必须是数字'})
         
         # 验证参数
         if not category or not size_mb or not extension:
-            return jsonify({'success': False, 'message': '缺少必要参数'})
+            return ojson({'success': False, 'message': '缺少必要参数'})
         
-        if category not in ['video', 'audio', 'image', 'document']:
-            return jsonify({'success': False, 'message': '不支持的文件类别'})
+        if category not in _CATEGORY_LABELS:
+            return ojson({'success': False, 'message': '不支持的文件类别'})
         
         if category == 'document' and not document_type:
-            return jsonify({'success': False, 'message': '请选择文档类型'})
-        
-        # 确保输出目录存在
-        os.makedirs(app.config['OUTPUT_FOLDER'], exist_ok=True)
+            return ojson({'success': False, 'message': '请选择文档类型'})
         
-        # 生成唯一文件名
-        unique_id = str(uuid.uuid4())[:8]
-        temp_filename = f"generated_{unique_id}"
-        temp_file_path = os.path.join(app.config['OUTPUT_FOLDER'], temp_filename)
-        
-        # 根据类别调用不同的生成方法
-        if category == 'video':
-            # 导入视频生成模块
-            sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'addfile'))
-            try:
-                from video_add import generate_exact_video
-                # 生成视频文件 - 使用默认格式mp4
-                video_filename = f"{size_mb}MM.mp4"
-                video_path = os.path.join(app.config['OUTPUT_FOLDER'], video_filename)
-                print(f"🎥 正在生成视频: {video_filename} ({size_mb} MB)...第一个参数{video_path}")
-                generate_exact_video(video_path, size_mb)
-                if not os.path.exists(video_path):
-                    return jsonify({'success': False, 'message': f'视频文件生成失败'})
-                temp_file_path = video_path
-            except ImportError as e:
-                return jsonify({'success': False, 'message': f'导入视频生成模块失败: {str(e)}'})
-            except Exception as e:
-                return jsonify({'success': False, 'message': f'视频生成过程中出错: {str(e)}'})
-        
-        elif category == 'audio':
-            # 导入音频生成模块
-            sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'addfile'))
-            try:
-                from music_add import generate_noise_wav
-                # 生成音频文件 - 使用默认格式wav
-                audio_filename = f"{size_mb}MM.wav"
-                audio_path = os.path.join(app.config['OUTPUT_FOLDER'], audio_filename)
-                generate_noise_wav(audio_path, size_mb)
-                if not os.path.exists(audio_path):
-                    return jsonify({'success': False, 'message': '音频文件生成失败'})
-                temp_file_path = audio_path
-            except ImportError as e:
-                return jsonify({'success': False, 'message': f'导入音频生成模块失败: {str(e)}'})
-            except Exception as e:
-                return jsonify({'success': False, 'message': f'音频生成过程中出错: {str(e)}'})
-        
-        elif category == 'image':
-            # 导入图片生成模块
-            sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'addfile'))
-            try:
-                from image_add import generate_fixed_size_image
-                # 生成图片文件 - 使用默认格式png
-                image_filename = f"{size_mb}MM.png"
-                image_path = os.path.join(app.config['OUTPUT_FOLDER'], image_filename)
-                generate_fixed_size_image(image_path, size_mb)
-                if not os.path.exists(image_path):
-                    return jsonify({'success': False, 'message': '图片文件生成失败'})
-                temp_file_path = image_path
-            except ImportError as e:
-                return jsonify({'success': False, 'message': f'导入图片生成模块失败: {str(e)}'})
-            except Exception as e:
-                return jsonify({'success': False, 'message': f'图片生成过程中出错: {str(e)}'})
-        
-        elif category == 'document':
-            # 导入文档生成模块
-            sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'addfile'))
-            try:
-                if document_type == 'text':
-                    from txt_add import generate_text_file
-                    doc_filename = f"{size_mb}MM.txt"
-                    doc_path = os.path.join(app.config['OUTPUT_FOLDER'], doc_filename)
-                    generate_text_file(doc_path, size_mb)
-                elif document_type == 'chinese_pdf':
-                    from chinese_pdf import generate_chinese_pdf
-                    doc_filename = f"{size_mb}MM.pdf"
-                    doc_path = os.path.join(app.config['OUTPUT_FOLDER'], doc_filename)
-                    generate_chinese_pdf(doc_path, size_mb)
-                elif document_type == 'english_pdf':
-                    from english_pdf import generate_english_pdf
-                    doc_filename = f"{size_mb}MM.pdf"
-                    doc_path = os.path.join(app.config['OUTPUT_FOLDER'], doc_filename)
-                    generate_english_pdf(doc_path, size_mb)
-                elif document_type in ['docx', 'doc']:
-                    from docx_add import generate_fixed_size_docx
-                    doc_filename = f"{size_mb}MM.docx"
-                    doc_path = os.path.join(app.config['OUTPUT_FOLDER'], doc_filename)
-                    generate_fixed_size_docx(doc_path, size_mb)
-                else:
-                    return jsonify({'success': False, 'message': f'不支持的文档类型: {document_type}'})
-                
-                if not os.path.exists(doc_path):
-                    return jsonify({'success': False, 'message': '文档文件生成失败'})
-                temp_file_path = doc_path
-            except ImportError as e:
-                return jsonify({'success': False, 'message': f'导入文档生成模块失败: {str(e)}'})
-            except Exception as e:
-                return jsonify({'success': False, 'message': f'文档生成过程中出错: {str(e)}'})
-        
-        # ------------------ 修改的核心部分 ------------------
-        # 获取当前文件的默认格式
-        current_filename = os.path.basename(temp_file_path)
-        
-        # 根据后缀名大小写规则生成最终文件名
-        # 如果后缀是全大写 (如 PNG)，则文件名变为 10M1.PNG
-        # 如果后缀是小写 (如 png)，则文件名保持 10M.png
-        if extension.isupper():
-            final_filename = f"{size_mb}M1.{extension}"
-        else:
-            final_filename = f"{size_mb}M.{extension}"
-            
-        final_file_path = os.path.join(app.config['OUTPUT_FOLDER'], final_filename)
-        
-        # 检查是否需要重命名（只要临时路径和最终路径不同，就执行操作）
-        if temp_file_path != final_file_path:
-            try:
-                # 如果目标文件已存在，先删除，防止重命名报错
-                if os.path.exists(final_file_path):
-                    os.remove(final_file_path)
-                
-                # 直接重命名文件
-                os.rename(temp_file_path, final_file_path)
-            except Exception as e:
-                # 如果重命名失败，尝试复制后删除
-                try:
-                    shutil.copy2(temp_file_path, final_file_path)
-                    os.remove(temp_file_path)
-                except Exception as e2:
-                    return jsonify({'success': False, 'message': f'修改文件后缀失败: {str(e2)}'})
-        # ----------------------------------------------------
-        
-        # 获取最终文件信息
-        file_size_mb = round(get_file_size_mb(final_file_path), 2)
-        
-        # 返回成功结果
-        return jsonify({
-            'success': True,
-            'file_name': final_filename,
-            'file_path': final_file_path,
-            'file_size_mb': file_size_mb,
-            'file_type': category,
-            'download_url': f'/download_file?path={final_file_path}'
-        })
+        # 生成文件 (耗时操作，请求带 ?async=1 时放到后台任务中执行)
+        return run_job(generate_and_rename, category, size_mb, extension, document_type)
         
     except Exception as e:
         # 记录错误到控制台
         print(f"生成文件时发生错误: {str(e)}")
-        return jsonify({'success': False, 'message': f'生成过程中发生错误: {str(e)}'})
+        return ojson({'success': False, 'message': f'生成过程中发生错误: {str(e)}'})
+
+@app.route('/job/<job_id>')
+def job_status(job_id):
+    """查询后台任务状态，任务完成后返回其结果 (结果只能取一次，超过 JOB_RESULT_TTL 未取走会被清理)"""
+    _evict_expired_jobs()
+    future = _jobs.get(job_id)
+    if future is None:
+        return ojson({'success': False, 'message': '任务不存在'}), 404
+    
+    if not future.done():
+        return ojson({'success': True, 'job_id': job_id, 'status': 'running'})
+    
+    _jobs.pop(job_id, None)
+    result = dict(future.result())
+    result['job_id'] = job_id
+    result['status'] = 'done'
+    return ojson(result)
+
+
+def _accel_redirect_uri(file_path):
+    """
+    计算文件对应的 nginx internal location 地址
+    :return: X-Accel-Redirect 的 URI；未配置前缀或文件不在上传/输出目录下时返回 None
+    """
+    prefix = app.config['X_ACCEL_REDIRECT_PREFIX']
+    if not prefix:
+        return None
+    abs_path = os.path.abspath(file_path)
+    if not any(abs_path.startswith(folder + os.sep) for folder in _PROTECTED_DIRS):
+        return None
+    rel_path = os.path.relpath(abs_path).replace(os.sep, '/')
+    return prefix.rstrip('/') + '/' + quote(rel_path)
+
 
 @app.route('/download_file')
 def download_file():
@@ -933,12 +1191,21 @@ def download_file():
     file_path = request.args.get('path')
     
     if not file_path or not os.path.exists(file_path):
-        return jsonify({'success': False, 'message': '文件不存在'})
+        return ojson({'success': False, 'message': '文件不存在'})
     
     try:
-        return send_file(file_path, as_attachment=True)
+        accel_uri = _accel_redirect_uri(file_path)
+        if accel_uri:
+            # 只返回响应头，文件内容由 nginx 用 sendfile(2) 直接发送，Range/缓存验证也由 nginx 处理
+            response = werkzeug_send_file(file_path, request.environ, as_attachment=True, use_x_sendfile=True)
+            del response.headers['X-Sendfile']
+            response.headers['X-Accel-Redirect'] = accel_uri
+            return response
+
+        # conditional: 支持 ETag/Last-Modified 和 Range 请求，断点续传时只发送缺少的部分
+        return send_file(file_path, as_attachment=True, conditional=True, etag=True)
     except Exception as e:
-        return jsonify({'success': False, 'message': str(e)})
+        return ojson({'success': False, 'message': str(e)})
 
 
 @app.route('/delete_generated_file', methods=['POST'])
@@ -947,24 +1214,19 @@ def delete_generated_file():
     data = request.get_json()
     
     if not data or 'file_path' not in data:
-        return jsonify({'success': False, 'message': '缺少文件路径参数'})
+        return ojson({'success': False, 'message': '缺少文件路径参数'})
     
     file_path = data['file_path']
     
     try:
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            
-            # 检查是否为空目录，如果是则删除
-            parent_dir = os.path.dirname(file_path)
-            if os.path.exists(parent_dir) and not os.listdir(parent_dir):
-                os.rmdir(parent_dir)
-                
-            return jsonify({'success': True})
-        else:
-            return jsonify({'success': False, 'message': '文件不存在'})
+        os.remove(file_path)
+    except FileNotFoundError:
+        return ojson({'success': False, 'message': '文件不存在'})
     except Exception as e:
-        return jsonify({'success': False, 'message': str(e)})
+        return ojson({'success': False, 'message': str(e)})
+    
+    _remove_dir_if_empty(os.path.dirname(file_path))
+    return ojson({'success': True})
 
 
 @app.route('/delete_split_dir', methods=['POST'])
@@ -973,51 +1235,75 @@ def delete_split_dir():
     data = request.get_json()
     
     if not data or 'split_dir' not in data:
-        return jsonify({'success': False, 'message': '缺少目录路径参数'})
+        return ojson({'success': False, 'message': '缺少目录路径参数'})
     
     split_dir = data['split_dir']
     
     try:
         if os.path.exists(split_dir):
             shutil.rmtree(split_dir)
-            return jsonify({'success': True})
+            return ojson({'success': True})
         else:
-            return jsonify({'success': False, 'message': '目录不存在'})
+            return ojson({'success': False, 'message': '目录不存在'})
     except Exception as e:
-        return jsonify({'success': False, 'message': str(e)})
+        return ojson({'success': False, 'message': str(e)})
+
+
+def _iter_file_entries(folder):
+    """
+    递归遍历目录，逐个返回文件的 DirEntry (与 os.walk 一样不进入符号链接指向的目录)
+    DirEntry 自带文件类型和 stat 结果，不必再对每个文件单独调用 stat
+    """
+    try:
+        entries = os.scandir(folder)
+    except OSError:
+        return  # 与 os.walk 一样跳过无法读取 (或遍历时被删除) 的目录
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_file_entries(entry.path)
+            else:
+                yield entry
 
 
 @app.route('/list_output_files')
 def list_output_files():
     """列出输出目录中的所有文件"""
+    output_folder = app.config['OUTPUT_FOLDER']
     try:
         files = []
-        for root, dirs, filenames in os.walk(app.config['OUTPUT_FOLDER']):
-            for filename in filenames:
-                file_path = os.path.join(root, filename)
-                rel_path = os.path.relpath(file_path, app.config['OUTPUT_FOLDER'])
-                files.append({
-                    'path': file_path,
-                    'rel_path': rel_path,
-                    'name': filename,
-                    'size_mb': round(get_file_size_mb(file_path), 2),
-                    'type': get_file_type(filename)
-                })
+        for entry in _iter_file_entries(output_folder):
+            try:
+                size = entry.stat().st_size
+            except FileNotFoundError:
+                continue  # 遍历过程中被删除
+            files.append({
+                'path': entry.path,
+                'rel_path': os.path.relpath(entry.path, output_folder),
+                'name': entry.name,
+                'size_mb': round(get_file_size_mb(size), 2),
+                'type': get_file_type(entry.name)
+            })
         
-        return jsonify({'success': True, 'files': files})
+        return ojson({'success': True, 'files': files})
     except Exception as e:
-        return jsonify({'success': False, 'message': str(e)})
+        return ojson({'success': False, 'message': str(e)})
 
 
 if __name__ == '__main__':
-    # 检查FFmpeg是否安装
-    try:
-        subprocess.run(['ffmpeg', '-version'], check=True, capture_output=True)
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        print("错误: 未找到FFmpeg，请确保已安装FFmpeg并添加到系统PATH中")
-        sys.exit(1)
+    # 生成模块通过 logging 输出进度，这里让 INFO 级别的结果显示在控制台
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    # 检查FFmpeg是否安装 (只在 PATH 中查找，不启动子进程)；装了 PyAV 时没有命令行工具也能处理音视频
+    if find_tool('ffmpeg') is None:
+        if av is None:
+            print("错误: 未找到FFmpeg，请确保已安装FFmpeg并添加到系统PATH中")
+            sys.exit(1)
+        print("提示: 未找到FFmpeg命令行工具，音视频将只通过 PyAV 处理")
     
     # 启动Flask应用
     print("音视频图片文件分割工具启动中...")
     print("请在浏览器中访问: http://127.0.0.1:5000")
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    # 默认关闭调试模式 (重载器会多起一个进程轮询源文件，调试器会记录每个请求的异常现场)，
+    # 开发时设置环境变量 FLASK_DEBUG=1 即可重新打开
+    app.run(host='0.0.0.0', port=5000, threaded=True)
\ No newline at end of file
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""
+生产环境入口 (开发时仍可直接运行 python app.py)
+
+Linux:
+    gunicorn -k gthread -w 1 --threads 8 --timeout 0 wsgi:app
+Windows (gunicorn 不支持 Windows):
+    waitress-serve --threads=8 wsgi:app
+
+后台任务表保存在进程内存中，这里只用 1 个工作进程、靠多线程并发；
+如需多进程，需要让 /job/<job_id> 的轮询请求落在同一进程 (或改用外部任务队列)
+"""
+import logging
+
+from app import app
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=5000, threaded=True)